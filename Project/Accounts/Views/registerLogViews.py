@@ -328,17 +328,18 @@ class VerifyOTPView(APIView):
             }, status=status.HTTP_403_FORBIDDEN)
 
         # 5. Déduction de l'action si pas dans la session
+        # L'utilisateur est lu une seule fois : sa présence décide de l'action
+        user = User.objects.filter(full_phone_number=full_phone_number).first()
         action = session_data.get('action') if session_data else None
         if not action:
-            action = 'login' if User.objects.filter(full_phone_number=full_phone_number).exists() else 'register'
+            action = 'login' if user is not None else 'register'
 
         country_code = session_data.get('country_code') if session_data else phone_details.get("country_code", "+33")
 
         # 6. Gestion utilisateur
-        try:
-            user = User.objects.get(full_phone_number=full_phone_number)
+        if user is not None:
             logger.debug("user_found", user_id=str(user.id))
-        except User.DoesNotExist:
+        else:
             if action == 'register':
                 try:
                     import phonenumbers
@@ -0,0 +1,21 @@
+"""
+Middlewares de l'application Accounts
+"""
+from .utils import AuthUtils
+
+
+class ClientIPMiddleware:
+    """
+    Résout l'adresse IP du client une seule fois par requête
+
+    Le résultat (X-Forwarded-For filtré par TRUSTED_PROXIES, sinon
+    REMOTE_ADDR) est exposé dans `request.client_ip` et réutilisé par
+    AuthUtils.get_client_ip au lieu de réanalyser les en-têtes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.client_ip = AuthUtils._resolve_client_ip(request)
+        return self.get_response(request)
@@ -160,6 +160,14 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.full_phone_number
 
+    def get_full_name(self):
+        """Prénom et nom, ou chaîne vide s'ils ne sont pas renseignés."""
+        return f"{self.first_name} {self.last_name}".strip()
+
+    def get_display_name(self):
+        """Nom affichable (bénéficiaire, client) : nom complet, sinon le numéro."""
+        return self.get_full_name() or self.full_phone_number
+
     def soft_delete(self, reason="user_requested"):
         """
         Désactive l'utilisateur sans supprimer les données.
@@ -37,7 +37,16 @@ class AuthUtils:
         """
         Récupère l'adresse IP réelle du client en gérant les proxies.
         Priorité: X-Forwarded-For > REMOTE_ADDR
+        Réutilise `request.client_ip` si ClientIPMiddleware l'a déjà résolue.
         """
+        client_ip = getattr(request, 'client_ip', None)
+        if client_ip is not None:
+            return client_ip
+        return AuthUtils._resolve_client_ip(request)
+
+    @staticmethod
+    def _resolve_client_ip(request):
+        """Analyse les en-têtes de la requête pour en extraire l'IP du client."""
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
             # Prend la première IP non-trusted
@@ -145,25 +154,22 @@ class AuthUtils:
     def is_rate_limited(identifier, limit=5, window_seconds=600):
         """
         Vérifie si un identifiant (phone ou IP) est rate limited.
+
+        Compteur à fenêtre fixe : cache.add crée la clé avec son expiration
+        au premier appel, cache.incr l'incrémente ensuite de façon atomique.
         """
-        cache_key = f"rate_limit_{identifier}"
-        attempts = cache.get(cache_key, [])
-        
-        now = timezone.now()
-        # Garder seulement les tentatives récentes
-        recent_attempts = [
-            t for t in attempts 
-            if (now - t).total_seconds() < window_seconds
-        ]
-        
-        if len(recent_attempts) >= limit:
-            return True
-        
-        # Ajouter la tentative actuelle
-        recent_attempts.append(now)
-        cache.set(cache_key, recent_attempts, timeout=window_seconds)
-        
-        return False
+        cache_key = f"rate_limit:{identifier}"
+        if cache.add(cache_key, 1, timeout=window_seconds):
+            attempts = 1
+        else:
+            try:
+                attempts = cache.incr(cache_key)
+            except ValueError:
+                # La clé a expiré entre add et incr : nouvelle fenêtre
+                cache.set(cache_key, 1, timeout=window_seconds)
+                attempts = 1
+
+        return attempts > limit
     
     # Méthodes privées auxiliaires
     @staticmethod
@@ -14,6 +14,7 @@ from pathlib import Path
 from datetime import timedelta
 import os
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -80,7 +81,7 @@ INSTALLED_APPS = [
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         # 'Accounts.authentication.SessionKeyAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'Accounts.authentication.WalletJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -92,9 +93,20 @@ REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_RATES': {
         'anon': '10/hour',  # 10 tentatives par heure pour les anonymes
         'user': '1000/day'
-    }
+    },
+    # Erreurs de validation (is_valid(raise_exception=True)) au format standard
+    'EXCEPTION_HANDLER': 'Wallet.exceptions.api_exception_handler',
+    # JSON uniquement hors DEBUG : pas de négociation entre renderers
+    'DEFAULT_RENDERER_CLASSES': (
+        'rest_framework.renderers.JSONRenderer',
+    ),
 }
 
+if DEBUG:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] += (
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    )
+
 AUTH_USER_MODEL = 'Accounts.User'
 
 SIMPLE_JWT = {
@@ -107,6 +119,7 @@ SIMPLE_JWT = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'Accounts.middleware.ClientIPMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -149,6 +162,9 @@ if os.getenv('DATABASE_URL') or os.getenv('DATABASE_ENGINE') == 'django.db.backe
             'PASSWORD': get_required_env('DATABASE_PASSWORD'),
             'HOST': os.getenv('DATABASE_HOST', 'localhost'),
             'PORT': os.getenv('DATABASE_PORT', '5432'),
+            # Connexions persistantes : évite le handshake à chaque requête
+            'CONN_MAX_AGE': int(os.getenv('DATABASE_CONN_MAX_AGE', '600')),
+            'CONN_HEALTH_CHECKS': True,
         }
     }
 else:
@@ -189,6 +205,9 @@ AUTH_PASSWORD_VALIDATORS = [
 # }
 
 # Cahing Configuration en Développement avec LocMemCache
+# LocMemCache est propre à chaque processus : les verrous posés en cache (retrait
+# en cours) n'excluent alors que les requêtes d'un même worker. En production
+# multi-workers, utiliser le cache partagé Redis ci-dessus
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
@@ -237,15 +256,25 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+import logging
 import structlog
 
+# Niveau de log global (ex: WARNING en production pour rendre les logger.info no-op)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+if LOG_LEVEL not in LOG_LEVELS:
+    raise ImproperlyConfigured(
+        f"LOG_LEVEL invalide : {LOG_LEVEL!r}. Valeurs acceptées : {', '.join(LOG_LEVELS)}"
+    )
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
         'json_formatter': {
             '()': structlog.stdlib.ProcessorFormatter,
-            'processor': structlog.processors.JSONRenderer(),
+            # default=str : Decimal, UUID et datetime rendus tels quels (ex: "10.50")
+            'processor': structlog.processors.JSONRenderer(default=str),
         },
         'console_formatter': {
             '()': structlog.stdlib.ProcessorFormatter,
@@ -268,12 +297,12 @@ LOGGING = {
     'loggers': {
         '': {
             'handlers': ['console', 'json_file'],
-            'level': 'INFO',
+            'level': LOG_LEVEL,
             'propagate': True,
         },
         'wallet': {
             'handlers': ['console', 'json_file'],
-            'level': 'INFO',
+            'level': LOG_LEVEL,
             'propagate': False,
         },
     },
@@ -294,6 +323,9 @@ structlog.configure(
         structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
     ],
     logger_factory=structlog.stdlib.LoggerFactory(),
+    # Les appels sous LOG_LEVEL sont des no-op :
+    # ni construction de l'event dict ni passage dans la chaîne de processeurs
+    wrapper_class=structlog.make_filtering_bound_logger(getattr(logging, LOG_LEVEL)),
     cache_logger_on_first_use=True,
 )
 
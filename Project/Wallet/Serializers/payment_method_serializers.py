@@ -2,6 +2,7 @@
 Sérialiseurs pour les méthodes de paiement sauvegardées
 """
 from rest_framework import serializers
+from datetime import date
 from decimal import Decimal
 from ..models import PaymentMethod
 
@@ -78,7 +79,6 @@ class CreateCardPaymentMethodSerializer(serializers.Serializer):
     def validate(self, data):
         """Valide les données de la carte"""
         # Vérifier que la carte n'est pas expirée
-        from datetime import date
         expiry_month = data.get('card_expiry_month')
         expiry_year = data.get('card_expiry_year')
         
@@ -1,7 +1,12 @@
+import base64
+import uuid
+from datetime import datetime
 from rest_framework import serializers
 from django.utils import timezone
 from decimal import Decimal
 from ..models import Wallet, Transaction
+from .payment_method_serializers import PaymentMethodSerializer
+from ..utils.currency import CURRENCY_NAMES, CurrencyUtils
 
 
 class WalletSerializer(serializers.ModelSerializer):
@@ -27,26 +32,11 @@ class WalletSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
     def get_balance(self, obj):
-        return float(obj.balance)
+        return CurrencyUtils.format_cents(obj.balance_cents)
 
     def get_currency_display(self, obj):
         """Retourne le nom complet de la devise"""
-        currency_names = {
-            'EUR': 'Euro',
-            'XAF': 'Franc CFA (CEMAC)',
-            'XOF': 'Franc CFA (BCEAO)',
-            'NGN': 'Naira Nigérian',
-            'GHS': 'Cedi Ghanéen',
-            'KES': 'Shilling Kényan',
-            'ZAR': 'Rand Sud-Africain',
-            'TZS': 'Shilling Tanzanien',
-            'UGX': 'Shilling Ougandais',
-            'RWF': 'Franc Rwandais',
-            'BIF': 'Franc Burundais',
-            'ZMW': 'Kwacha Zambien',
-            'ZWD': 'Dollar Zimbabwéen',
-        }
-        return currency_names.get(obj.currency, obj.currency)
+        return CURRENCY_NAMES.get(obj.currency, obj.currency)
 
 
 class TransactionSerializer(serializers.ModelSerializer):
@@ -59,7 +49,23 @@ class TransactionSerializer(serializers.ModelSerializer):
     transaction_type_display = serializers.CharField(source='get_transaction_type_display', read_only=True)
     payment_method_display = serializers.CharField(source='get_payment_method_display', read_only=True)
     currency_display = serializers.SerializerMethodField()
-    payment_method_saved_info = serializers.SerializerMethodField()
+    payment_method_saved_info = PaymentMethodSerializer(source='payment_method_saved', read_only=True)
+
+    # Colonnes de la table transactions lues par ce sérialiseur (projection .only())
+    QUERY_FIELDS = (
+        'id',
+        'transaction_type',
+        'payment_method',
+        'payment_method_saved',
+        'amount_cents',
+        'fee_cents',
+        'currency',
+        'status',
+        'flutterwave_reference',
+        'created_at',
+        'updated_at',
+        'completed_at',
+    )
 
     class Meta:
         model = Transaction
@@ -85,36 +91,36 @@ class TransactionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'flutterwave_reference', 'created_at', 'updated_at', 'completed_at']
 
     def get_amount(self, obj):
-        return float(obj.amount_euros)
+        return CurrencyUtils.format_cents(obj.amount_cents)
 
     def get_fee(self, obj):
-        return float(obj.fee_euros)
+        return CurrencyUtils.format_cents(obj.fee_cents)
 
     def get_currency_display(self, obj):
         """Retourne le nom complet de la devise"""
-        currency_names = {
-            'EUR': 'Euro',
-            'XAF': 'Franc CFA (CEMAC)',
-            'XOF': 'Franc CFA (BCEAO)',
-            'NGN': 'Naira Nigérian',
-            'GHS': 'Cedi Ghanéen',
-            'KES': 'Shilling Kényan',
-            'ZAR': 'Rand Sud-Africain',
-            'TZS': 'Shilling Tanzanien',
-            'UGX': 'Shilling Ougandais',
-            'RWF': 'Franc Rwandais',
-            'BIF': 'Franc Burundais',
-            'ZMW': 'Kwacha Zambien',
-            'ZWD': 'Dollar Zimbabwéen',
-        }
-        return currency_names.get(obj.currency, obj.currency)
-    
-    def get_payment_method_saved_info(self, obj):
-        """Retourne les informations de la méthode de paiement sauvegardée si disponible"""
-        if obj.payment_method_saved:
-            from ..Serializers.payment_method_serializers import PaymentMethodSerializer
-            return PaymentMethodSerializer(obj.payment_method_saved).data
-        return None
+        return CURRENCY_NAMES.get(obj.currency, obj.currency)
+
+
+class WalletDetailSerializer(WalletSerializer):
+    """
+    Sérialiseur du portefeuille avec ses transactions récentes
+
+    Attend sur l'instance les attributs `recent_tx` (transactions déjà
+    chargées) et `tx_count` (nombre total), calculés par la vue.
+    """
+    transactions_count = serializers.IntegerField(source='tx_count', read_only=True)
+    recent_transactions = TransactionSerializer(source='recent_tx', many=True, read_only=True)
+    currency_info = serializers.SerializerMethodField()
+
+    class Meta(WalletSerializer.Meta):
+        fields = WalletSerializer.Meta.fields + [
+            'transactions_count',
+            'recent_transactions',
+            'currency_info',
+        ]
+
+    def get_currency_info(self, obj):
+        return CurrencyUtils.get_info(obj.currency)
 
 
 class DepositSerializer(serializers.Serializer):
@@ -396,6 +402,25 @@ class TransactionListSerializer(serializers.Serializer):
     date_to = serializers.DateField(required=False)
     limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
     offset = serializers.IntegerField(min_value=0, default=0)
+    cursor = serializers.CharField(
+        required=False,
+        help_text="Curseur opaque (next_cursor de la page précédente) ; remplace offset"
+    )
+
+    @staticmethod
+    def encode_cursor(transaction):
+        """Construit le curseur pointant juste après cette transaction"""
+        raw = f"{transaction.created_at.isoformat()}|{transaction.id}"
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def validate_cursor(self, value):
+        """Décode le curseur en (created_at, id)"""
+        try:
+            raw = base64.urlsafe_b64decode(value.encode('ascii')).decode('utf-8')
+            created_at, transaction_id = raw.split('|', 1)
+            return datetime.fromisoformat(created_at), uuid.UUID(transaction_id)
+        except (ValueError, UnicodeError):
+            raise serializers.ValidationError("Curseur invalide")
 
 
 class TransactionConfirmSerializer(serializers.Serializer):
@@ -432,4 +457,26 @@ class TransactionStatusUpdateSerializer(serializers.Serializer):
     )
     error_message = serializers.CharField(max_length=500, required=False)
     error_code = serializers.CharField(max_length=100, required=False)
-    notes = serializers.CharField(max_length=500, required=False)
\ No newline at end of file
+    notes = serializers.CharField(max_length=500, required=False)
+
+class FeeEstimateSerializer(serializers.Serializer):
+    """
+    Sérialiseur pour l'estimation des frais d'un dépôt ou d'un retrait
+    """
+    transaction_type = serializers.ChoiceField(
+        choices=[('deposit', 'Dépôt'), ('withdrawal', 'Retrait')]
+    )
+    amount = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        min_value=Decimal('0.01'),
+        help_text="Montant dans la devise du portefeuille"
+    )
+    payment_method = serializers.ChoiceField(
+        choices=[('card', 'Carte bancaire'), ('orange_money', 'Orange Money')]
+    )
+    currency = serializers.CharField(
+        max_length=3,
+        required=False,
+        help_text="Devise (optionnel, celle du wallet si absente)"
+    )
@@ -1,21 +1,40 @@
 """
 Service de base Flutterwave avec gestion des environnements et retry logic
 """
+import base64
+import hashlib
+import hmac
 import requests
 import time
 import structlog
 from django.conf import settings
+from requests.adapters import HTTPAdapter
 from typing import Dict, Optional, Any
 
 logger = structlog.get_logger(__name__)
 
 
+def _build_http_session() -> requests.Session:
+    """
+    Crée la session HTTP partagée par tous les services Flutterwave
+    Le pool garde les connexions TLS ouvertes (keep-alive) entre les appels
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
 class FlutterwaveBaseService:
     """
     Service de base pour l'intégration Flutterwave
     Gère l'environnement (sandbox/production), les tokens, et les retries
     """
     
+    # Session HTTP unique par processus (pool de connexions partagé)
+    session = _build_http_session()
+    
     def __init__(self):
         # Helper pour nettoyer les variables d'environnement
         def clean_env(val):
@@ -108,7 +127,7 @@ class FlutterwaveBaseService:
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
         
         try:
-            resp = requests.post(self.auth_url, data=payload, headers=headers, timeout=self.timeout)
+            resp = self.session.post(self.auth_url, data=payload, headers=headers, timeout=self.timeout)
             if resp.status_code == 200:
                 token_data = resp.json()
                 access_token = token_data["access_token"]
@@ -177,16 +196,16 @@ class FlutterwaveBaseService:
                 logger.debug("flutterwave_request_start", method=method, endpoint=endpoint, attempt=attempt+1)
                 
                 if method.upper() == 'GET':
-                    resp = requests.get(url, headers=request_headers, timeout=self.timeout)
+                    resp = self.session.get(url, headers=request_headers, timeout=self.timeout)
                 elif method.upper() == 'POST':
                     if data:
-                        resp = requests.post(url, data=data, headers=request_headers, timeout=self.timeout)
+                        resp = self.session.post(url, data=data, headers=request_headers, timeout=self.timeout)
                     else:
-                        resp = requests.post(url, json=json_data, headers=request_headers, timeout=self.timeout)
+                        resp = self.session.post(url, json=json_data, headers=request_headers, timeout=self.timeout)
                 elif method.upper() == 'PUT':
-                    resp = requests.put(url, json=json_data, headers=request_headers, timeout=self.timeout)
+                    resp = self.session.put(url, json=json_data, headers=request_headers, timeout=self.timeout)
                 elif method.upper() == 'PATCH':
-                    resp = requests.patch(url, json=json_data, headers=request_headers, timeout=self.timeout)
+                    resp = self.session.patch(url, json=json_data, headers=request_headers, timeout=self.timeout)
                 else:
                     raise ValueError(f"Méthode HTTP non supportée: {method}")
                 
@@ -286,17 +305,14 @@ class FlutterwaveBaseService:
         Returns:
             bool: True si la signature est valide
         """
-        import hmac
-        import hashlib
-        import base64
-        
         if not self.webhook_secret:
             logger.warning("webhook_secret_not_configured")
             return False
         
         try:
             # 1. Vérification standard Flutterwave (Secret Hash direct)
-            if signature == self.webhook_secret:
+            # Comparaison à temps constant pour ne rien révéler du secret
+            if hmac.compare_digest(signature.encode('utf-8'), self.webhook_secret.encode('utf-8')):
                 return True
                 
             # 2. Fallback HMAC (si configuré comme tel)
@@ -3,6 +3,7 @@ Service principal d'intégration avec Flutterwave
 Orchestre les services spécialisés pour carte et Orange Money
 """
 import structlog
+from decimal import Decimal
 from django.conf import settings
 from typing import Dict, Optional, Any
 from .flutterwave.card import flutterwave_card_service
@@ -131,7 +132,6 @@ class FlutterwaveService(FlutterwaveBaseService):
                     account_number, bank_code, account_name, recipient_type)
                 
                 # TRANSFORMATION PRÉCISE EN CENTIMES
-                from decimal import Decimal
                 amount_cents = int(Decimal(str(amount)) * 100)
                 
                 # Initier transfert
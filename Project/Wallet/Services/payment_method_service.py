@@ -3,8 +3,10 @@ Service pour gérer les méthodes de paiement sauvegardées
 """
 import structlog
 from django.db import transaction as db_transaction
+from django.db.models import Case, F, Q, Value, When
 from django.utils import timezone
 from ..models import PaymentMethod
+from ..utils.cache import CacheUtils
 from django.conf import settings
 
 logger = structlog.get_logger(__name__)
@@ -250,7 +252,49 @@ class PaymentMethodService:
             queryset = queryset.filter(is_active=True)
         
         return queryset.order_by('-is_default', '-last_used_at', '-created_at')
-    
+
+    @staticmethod
+    def set_default_payment_method(user, payment_method):
+        """
+        Définit une méthode de paiement comme méthode par défaut de son type
+
+        Un seul UPDATE bascule la cible à True et les anciennes méthodes par
+        défaut du même type à False, dans une transaction atomique.
+
+        Args:
+            user: Instance User
+            payment_method: Instance PaymentMethod appartenant à l'utilisateur
+
+        Returns:
+            PaymentMethod: La méthode mise à jour (en mémoire)
+        """
+        now = timezone.now()
+
+        with db_transaction.atomic():
+            PaymentMethod.objects.filter(
+                Q(is_default=True) | Q(id=payment_method.id),
+                user=user,
+                method_type=payment_method.method_type
+            ).update(
+                is_default=Case(
+                    When(id=payment_method.id, then=Value(True)),
+                    default=Value(False)
+                ),
+                updated_at=Case(
+                    When(id=payment_method.id, then=Value(now)),
+                    default=F('updated_at')
+                )
+            )
+
+        # UPDATE en masse : le signal post_save n'est pas émis. Invalidation
+        # différée au commit si l'appelant est lui-même dans une transaction
+        CacheUtils.bump_version('payment_methods', user.id)
+
+        payment_method.is_default = True
+        payment_method.updated_at = now
+
+        return payment_method
+
     @staticmethod
     def _detect_card_brand(card_number):
         """
@@ -1,14 +1,62 @@
 import structlog
+from django.core.cache import cache
 from django.db import transaction as db_transaction
 from django.db.models import Sum, Count, Q
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
+from Accounts.utils import AuthUtils
 from ..models import Wallet, Transaction, PaymentMethod
+from ..utils.currency import CurrencyUtils
 from .flutterwave_service import flutterwave_service
 from .payment_method_service import payment_method_service
 
 logger = structlog.get_logger(__name__)
 
+# Durée (secondes) pendant laquelle un statut Flutterwave vérifié est réutilisé
+FLUTTERWAVE_STATUS_CACHE_TIMEOUT = 30
+
+# Statistiques globales (admin) : clé et durée (secondes) de mise en cache
+WALLET_STATS_CACHE_KEY = "wallet:stats"
+WALLET_STATS_CACHE_TIMEOUT = 300
+
+# Montant maximum autorisé par transaction, selon la devise
+DEFAULT_MAX_AMOUNT = 10000
+MAX_AMOUNT_BY_CURRENCY = {
+    'EUR': 10000,      # Max 10,000€
+    'XAF': 5000000,    # Max 5M FCFA
+    'XOF': 5000000,    # Max 5M FCFA
+    'NGN': 5000000,    # Max 5M NGN
+    'GHS': 100000,     # Max 100k dans ces devises
+    'KES': 100000,
+    'ZAR': 100000,
+}
+
+# Barème des frais (construit une seule fois au chargement du module)
+ZERO = Decimal('0')
+# Les frais sont arrondis au centime, l'unité de stockage des montants (*_cents)
+CENT = Decimal('0.01')
+
+DEPOSIT_CARD_FEE_RATE = Decimal('0.029')
+DEPOSIT_CARD_DEFAULT_FIXED_FEE = Decimal('1')  # 1 unité par défaut
+DEPOSIT_CARD_FIXED_FEES = {
+    'EUR': Decimal('0.25'),
+    'XAF': Decimal('200'),  # 200 FCFA
+    'XOF': Decimal('200'),
+    'NGN': Decimal('100'),  # 100 NGN
+}
+DEPOSIT_MOBILE_MONEY_FEE_RATE = Decimal('0.05')
+
+WITHDRAWAL_CARD_FEE_RATE = Decimal('0.03')
+WITHDRAWAL_CARD_DEFAULT_FIXED_FEE = Decimal('2')  # 2 unités par défaut
+WITHDRAWAL_CARD_FIXED_FEES = {
+    'EUR': Decimal('0.50'),
+    'XAF': Decimal('300'),  # 300 FCFA
+    'XOF': Decimal('300'),
+    'NGN': Decimal('200'),  # 200 NGN
+}
+WITHDRAWAL_MOBILE_MONEY_FEE_RATE = Decimal('0.06')
+
 
 class WalletService:
     """
@@ -41,11 +89,44 @@ class WalletService:
         Returns:
             Wallet: Le wallet de l'utilisateur
         """
+        # Wallet déjà chargé avec l'utilisateur (select_related à l'authentification)
+        try:
+            return user.wallet
+        except Wallet.DoesNotExist:
+            pass
+
         wallet, created = Wallet.objects.get_or_create(user=user)
         if created:
             logger.info("wallet_auto_created", user_id=str(user.id), wallet_id=str(wallet.id))
+        # Réutiliser l'instance User déjà chargée : wallet.user et user.wallet
+        # sont alors servis depuis le cache de relation, sans requête supplémentaire
+        wallet.user = user
         return wallet
 
+    @staticmethod
+    def get_wallet_currency(user):
+        """
+        Récupère uniquement la devise du wallet d'un utilisateur
+
+        Sans requête si le wallet a été chargé avec l'utilisateur
+        (WalletJWTAuthentication) ; sinon ne lit que la colonne currency.
+        Le wallet n'est créé (via get_or_create_wallet) que s'il n'existe
+        pas encore.
+
+        Args:
+            user: Instance User
+
+        Returns:
+            str: Code devise ISO du wallet
+        """
+        if type(user).wallet.is_cached(user):
+            return WalletService.get_or_create_wallet(user).currency
+
+        currency = Wallet.objects.filter(user=user).values_list('currency', flat=True).first()
+        if currency is None:
+            currency = WalletService.get_or_create_wallet(user).currency
+        return currency
+
     @staticmethod
     def initiate_deposit(user, amount, payment_method, card_details=None, request_meta=None,
                         payment_method_id=None, save_payment_method=False, 
@@ -76,6 +157,7 @@ class WalletService:
 
         # Récupération du wallet
         wallet = WalletService.get_or_create_wallet(user)
+        log = logger.bind(user_id=str(user.id), wallet_id=str(wallet.id), currency=wallet.currency)
 
         # Utiliser Decimal pour la précision
         amount_dec = Decimal(str(amount))
@@ -164,7 +246,7 @@ class WalletService:
             customer_email=user.email,
             customer_phone=user.phone_number, # Numéro national (7-10 chiffres)
             country_code=user.country_code.replace('+', ''), # Ex: 33
-            customer_name=f"{user.first_name} {user.last_name}".strip() or user.full_phone_number,
+            customer_name=user.get_display_name(),
             card_details=card_details,
             address=address_data,
             customer_id=user.flutterwave_customer_id,
@@ -197,7 +279,7 @@ class WalletService:
                     )
                     transaction.payment_method_saved = new_payment_method
                 except Exception as e:
-                    logger.exception("failed_to_save_payment_method", user_id=str(user.id))
+                    log.exception("failed_to_save_payment_method")
 
             if not flutterwave_result["success"]:
                 transaction.mark_failed(
@@ -217,9 +299,8 @@ class WalletService:
             transaction.status = 'processing'
             transaction.save()
 
-            logger.info(
+            log.info(
                 "deposit_initiated",
-                user_id=str(user.id),
                 transaction_id=str(transaction.id),
                 amount=amount,
                 payment_method=payment_method,
@@ -270,6 +351,7 @@ class WalletService:
         with db_transaction.atomic():
             # VERROUILLAGE PHYSIQUE (Pessimistic Locking)
             wallet = Wallet.objects.select_for_update().get(user=user)
+            log = logger.bind(user_id=str(user.id), wallet_id=str(wallet.id), currency=wallet.currency)
 
             # Validation du montant selon la devise
             if not WalletService._validate_amount_for_currency(amount_dec, wallet.currency):
@@ -314,7 +396,7 @@ class WalletService:
                     elif payment_method == 'orange_money':
                         account_details = {
                             'phone_number': saved_payment_method.orange_money_number,
-                            'beneficiary_name': f"{user.first_name} {user.last_name}".strip() or user.full_phone_number
+                            'beneficiary_name': user.get_display_name()
                         }
                 except (PaymentMethod.DoesNotExist, ValueError) as e:
                     return {
@@ -373,7 +455,7 @@ class WalletService:
                     transaction.payment_method_saved = new_payment_method
                     transaction.save()
                 except Exception as e:
-                    logger.exception("failed_to_save_payment_method", user_id=str(user.id))
+                    log.exception("failed_to_save_payment_method")
 
         # APPEL FLUTTERWAVE (Hors verrou DB pour éviter de bloquer la ligne trop longtemps)
         # Préparer recipient_details selon le format attendu par Flutterwave
@@ -393,12 +475,11 @@ class WalletService:
             # On prend soit le msisdn complet soit orange_money_number
             full_phone = account_details.get('phone_number') or user.full_phone_number
             # On réuitilise la même logique que pour le dépôt pour plus de sécurité
-            from Accounts.utils import AuthUtils
             country_code, national_phone = AuthUtils.parse_phone_number(full_phone)
             
             recipient_details = {
                 "phone": national_phone,
-                "name": account_details.get('beneficiary_name') or f"{user.first_name} {user.last_name}".strip(),
+                "name": account_details.get('beneficiary_name') or user.get_full_name(),
                 "country_code": country_code.replace('+', '')
             }
         
@@ -432,9 +513,8 @@ class WalletService:
         transaction.save()
 
 
-        logger.info(
+        log.info(
             "withdrawal_initiated",
-            user_id=str(user.id),
             transaction_id=str(transaction.id),
             amount=amount,
             payment_method=payment_method,
@@ -447,7 +527,8 @@ class WalletService:
                 "reference": flutterwave_result["reference"],
                 "amount": amount,
                 "fee": fee_amount,
-                "total_deducted": total_deduct
+                "total_deducted": total_deduct,
+                "currency": wallet.currency
             }
 
     @staticmethod
@@ -480,25 +561,36 @@ class WalletService:
         flutterwave_id = str(data.get("id"))
 
         try:
-            transaction = Transaction.objects.get(
-                flutterwave_reference=tx_ref,
-                transaction_type='deposit'
-            )
-
-            if status == "successful":
-                transaction.mark_completed()
-                logger.info(
-                    "deposit_completed_via_webhook",
-                    transaction_id=str(transaction.id),
-                    flutterwave_id=flutterwave_id
-                )
-                return {"success": True, "message": "Dépôt traité avec succès"}
-            else:
-                transaction.mark_failed(
-                    error_message=f"Payment {status}",
-                    error_code="payment_failed"
+            # Verrou sur la ligne : le webhook, l'admin et la confirmation
+            # client ne peuvent pas créditer deux fois le même dépôt
+            with db_transaction.atomic():
+                transaction = Transaction.objects.select_for_update().get(
+                    flutterwave_reference=tx_ref,
+                    transaction_type='deposit'
                 )
-                return {"success": True, "message": "Échec du dépôt enregistré"}
+
+                if transaction.status not in ('pending', 'processing'):
+                    logger.info(
+                        "deposit_webhook_already_processed",
+                        transaction_id=str(transaction.id),
+                        current_status=transaction.status
+                    )
+                    return {"success": True, "message": "Dépôt déjà traité"}
+
+                if status == "successful":
+                    transaction.mark_completed()
+                    logger.info(
+                        "deposit_completed_via_webhook",
+                        transaction_id=str(transaction.id),
+                        flutterwave_id=flutterwave_id
+                    )
+                    return {"success": True, "message": "Dépôt traité avec succès"}
+                else:
+                    transaction.mark_failed(
+                        error_message=f"Payment {status}",
+                        error_code="payment_failed"
+                    )
+                    return {"success": True, "message": "Échec du dépôt enregistré"}
 
         except Transaction.DoesNotExist:
             logger.warning("webhook_transaction_not_found", tx_ref=tx_ref)
@@ -511,52 +603,62 @@ class WalletService:
         status = data.get("status")
 
         try:
-            transaction = Transaction.objects.get(
-                flutterwave_reference=reference,
-                transaction_type='withdrawal'
-            )
+            # Verrou sur la ligne : débit ou remboursement appliqué une seule fois
+            with db_transaction.atomic():
+                transaction = Transaction.objects.select_for_update().get(
+                    flutterwave_reference=reference,
+                    transaction_type='withdrawal'
+                )
 
-            if status == "successful":
-                transaction.mark_completed()
-                
-                # Sauvegarder les informations supplémentaires
-                proof = data.get("payment_information", {}).get("proof")
-                if proof:
-                    transaction.transfer_proof = proof
-                
-                # Construire extra_data avec les infos pertinentes
-                extra_info = {
-                    "bank": data.get("bank"),
-                    "debit_information": data.get("debit_information"),
-                    "webhook_meta": data.get("meta")
-                }
-                # Mettre à jour extra_data sans écraser l'existant si possible
-                if transaction.extra_data:
-                    transaction.extra_data.update(extra_info)
+                if transaction.status not in ('pending', 'processing'):
+                    logger.info(
+                        "withdrawal_webhook_already_processed",
+                        transaction_id=str(transaction.id),
+                        current_status=transaction.status
+                    )
+                    return {"success": True, "message": "Retrait déjà traité"}
+
+                if status == "successful":
+                    transaction.mark_completed()
+
+                    # Sauvegarder les informations supplémentaires
+                    proof = data.get("payment_information", {}).get("proof")
+                    if proof:
+                        transaction.transfer_proof = proof
+
+                    # Construire extra_data avec les infos pertinentes
+                    extra_info = {
+                        "bank": data.get("bank"),
+                        "debit_information": data.get("debit_information"),
+                        "webhook_meta": data.get("meta")
+                    }
+                    # Mettre à jour extra_data sans écraser l'existant si possible
+                    if transaction.extra_data:
+                        transaction.extra_data.update(extra_info)
+                    else:
+                        transaction.extra_data = extra_info
+
+                    transaction.save()
+
+                    logger.info(
+                        "withdrawal_completed_via_webhook",
+                        transaction_id=str(transaction.id),
+                        reference=reference,
+                        proof=proof
+                    )
+                    return {"success": True, "message": "Retrait traité avec succès"}
                 else:
-                    transaction.extra_data = extra_info
-                
-                transaction.save()
+                    # REMBOURSER LE SOLDE en cas d'échec du transfert
+                    if transaction.balance_adjusted:
+                        total_to_refund = (Decimal(transaction.amount_cents) + Decimal(transaction.fee_cents)) / 100
+                        transaction.wallet.add_balance(total_to_refund)
+                        transaction.balance_adjusted = False
 
-                logger.info(
-                    "withdrawal_completed_via_webhook",
-                    transaction_id=str(transaction.id),
-                    reference=reference,
-                    proof=proof
-                )
-                return {"success": True, "message": "Retrait traité avec succès"}
-            else:
-                # REMBOURSER LE SOLDE en cas d'échec du transfert
-                if transaction.balance_adjusted:
-                    total_to_refund = (Decimal(transaction.amount_cents) + Decimal(transaction.fee_cents)) / 100
-                    transaction.wallet.add_balance(total_to_refund)
-                    transaction.balance_adjusted = False
-                
-                transaction.mark_failed(
-                    error_message=f"Transfer {status}",
-                    error_code="transfer_failed"
-                )
-                return {"success": True, "message": "Échec du retrait enregistré et solde remboursé"}
+                    transaction.mark_failed(
+                        error_message=f"Transfer {status}",
+                        error_code="transfer_failed"
+                    )
+                    return {"success": True, "message": "Échec du retrait enregistré et solde remboursé"}
 
         except Transaction.DoesNotExist:
             logger.warning("webhook_transfer_not_found", reference=reference)
@@ -577,17 +679,7 @@ class WalletService:
         if amount <= 0:
             return False
 
-        # Règles spécifiques selon la devise
-        if currency == 'EUR':
-            return amount <= 10000  # Max 10,000€
-        elif currency in ['XAF', 'XOF']:  # Franc CFA
-            return amount <= 5000000  # Max 5M FCFA
-        elif currency == 'NGN':
-            return amount <= 5000000  # Max 5M NGN
-        elif currency in ['GHS', 'KES', 'ZAR']:
-            return amount <= 100000  # Max 100k dans ces devises
-        else:
-            return amount <= 10000  # Défaut
+        return amount <= MAX_AMOUNT_BY_CURRENCY.get(currency, DEFAULT_MAX_AMOUNT)
 
     @staticmethod
     def _calculate_deposit_fee(amount, payment_method, currency):
@@ -600,25 +692,18 @@ class WalletService:
             currency: Code devise
 
         Returns:
-            Decimal: Montant des frais
+            Decimal: Montant des frais, arrondi au centime
         """
         if payment_method == 'card':
             # Frais pour carte : 2.9% + frais fixes selon devise
-            fee_rate = Decimal('0.029')
-            if currency == 'EUR':
-                fixed_fee = Decimal('0.25')
-            elif currency in ['XAF', 'XOF']:
-                fixed_fee = Decimal('200')  # 200 FCFA
-            elif currency == 'NGN':
-                fixed_fee = Decimal('100')  # 100 NGN
-            else:
-                fixed_fee = Decimal('1')  # 1 unité par défaut
+            fee_rate = DEPOSIT_CARD_FEE_RATE
+            fixed_fee = DEPOSIT_CARD_FIXED_FEES.get(currency, DEPOSIT_CARD_DEFAULT_FIXED_FEE)
         else:  # orange_money
             # Frais pour mobile money : 5%
-            fee_rate = Decimal('0.05')
-            fixed_fee = Decimal('0')
+            fee_rate = DEPOSIT_MOBILE_MONEY_FEE_RATE
+            fixed_fee = ZERO
 
-        return (amount * fee_rate) + fixed_fee
+        return ((amount * fee_rate) + fixed_fee).quantize(CENT, rounding=ROUND_HALF_UP)
 
     @staticmethod
     def _calculate_withdrawal_fee(amount, payment_method, currency):
@@ -631,65 +716,18 @@ class WalletService:
             currency: Code devise
 
         Returns:
-            Decimal: Montant des frais
+            Decimal: Montant des frais, arrondi au centime
         """
         if payment_method == 'card':
             # Frais pour carte : 3% + frais fixes
-            fee_rate = Decimal('0.03')
-            if currency == 'EUR':
-                fixed_fee = Decimal('0.50')
-            elif currency in ['XAF', 'XOF']:
-                fixed_fee = Decimal('300')  # 300 FCFA
-            elif currency == 'NGN':
-                fixed_fee = Decimal('200')  # 200 NGN
-            else:
-                fixed_fee = Decimal('2')  # 2 unités par défaut
+            fee_rate = WITHDRAWAL_CARD_FEE_RATE
+            fixed_fee = WITHDRAWAL_CARD_FIXED_FEES.get(currency, WITHDRAWAL_CARD_DEFAULT_FIXED_FEE)
         else:  # orange_money
             # Frais pour mobile money : 6%
-            fee_rate = Decimal('0.06')
-            fixed_fee = Decimal('0')
+            fee_rate = WITHDRAWAL_MOBILE_MONEY_FEE_RATE
+            fixed_fee = ZERO
 
-        return (amount * fee_rate) + fixed_fee
-
-    @staticmethod
-    def _get_currency_symbol(currency):
-        """Retourne le symbole de la devise"""
-        symbols = {
-            'EUR': '€',
-            'XAF': 'FCFA',
-            'XOF': 'FCFA',
-            'NGN': '₦',
-            'GHS': '₵',
-            'KES': 'KSh',
-            'ZAR': 'R',
-            'TZS': 'TSh',
-            'UGX': 'USh',
-            'RWF': 'FRw',
-            'BIF': 'FBu',
-            'ZMW': 'ZK',
-            'ZWD': '$',
-        }
-        return symbols.get(currency, currency)
-
-    @staticmethod
-    def _get_currency_name(currency):
-        """Retourne le nom complet de la devise"""
-        names = {
-            'EUR': 'Euro',
-            'XAF': 'Franc CFA (CEMAC)',
-            'XOF': 'Franc CFA (BCEAO)',
-            'NGN': 'Naira Nigérian',
-            'GHS': 'Cedi Ghanéen',
-            'KES': 'Shilling Kényan',
-            'ZAR': 'Rand Sud-Africain',
-            'TZS': 'Shilling Tanzanien',
-            'UGX': 'Shilling Ougandais',
-            'RWF': 'Franc Rwandais',
-            'BIF': 'Franc Burundais',
-            'ZMW': 'Kwacha Zambien',
-            'ZWD': 'Dollar Zimbabwéen',
-        }
-        return names.get(currency, currency)
+        return ((amount * fee_rate) + fixed_fee).quantize(CENT, rounding=ROUND_HALF_UP)
 
     @staticmethod
     def confirm_deposit(user, transaction_id, confirmation_data=None):
@@ -708,31 +746,30 @@ class WalletService:
             # Récupération du wallet
             wallet = WalletService.get_or_create_wallet(user)
 
-            # Récupération de la transaction
-            transaction = wallet.transactions.get(
-                id=transaction_id,
-                transaction_type='deposit'
-            )
+            with db_transaction.atomic():
+                # Récupération de la transaction, verrouillée jusqu'à la fin du bloc :
+                # un webhook et une action manuelle concurrents ne peuvent pas la
+                # traiter deux fois (le second voit le statut mis à jour)
+                transaction = wallet.transactions.select_for_update().get(
+                    id=transaction_id,
+                    transaction_type='deposit'
+                )
 
-            # Vérification du statut
-            if transaction.status not in ['pending', 'processing']:
-                return {
-                    "success": False,
-                    "error": f"Impossible de confirmer un dépôt {transaction.get_status_display()}",
-                    "code": "invalid_status"
-                }
+                # Vérification du statut
+                if transaction.status not in ['pending', 'processing']:
+                    return {
+                        "success": False,
+                        "error": f"Impossible de confirmer un dépôt {transaction.get_status_display()}",
+                        "code": "invalid_status"
+                    }
 
-            with db_transaction.atomic():
                 # Calculer le montant à créditer
                 amount_to_credit = Decimal(str(transaction.amount_cents)) / Decimal('100')
 
-                # Marquer la transaction comme terminée (cela crédite automatiquement le wallet)
+                # Marquer la transaction comme terminée (cela crédite automatiquement le wallet,
+                # renseigne completed_at et rafraîchit le solde de transaction.wallet, qui est
+                # la même instance que wallet)
                 transaction.mark_completed()
-                transaction.completed_at = timezone.now()
-                transaction.save()
-
-                # Rafraîchir le wallet pour obtenir le solde à jour
-                wallet.refresh_from_db()
 
                 logger.info(
                     "deposit_confirmed",
@@ -780,21 +817,21 @@ class WalletService:
             # Récupération du wallet
             wallet = WalletService.get_or_create_wallet(user)
 
-            # Récupération de la transaction
-            transaction = wallet.transactions.get(
-                id=transaction_id,
-                transaction_type='deposit'
-            )
+            with db_transaction.atomic():
+                # Récupération de la transaction, verrouillée (voir confirm_deposit)
+                transaction = wallet.transactions.select_for_update().get(
+                    id=transaction_id,
+                    transaction_type='deposit'
+                )
 
-            # Vérification du statut
-            if transaction.status not in ['pending', 'processing']:
-                return {
-                    "success": False,
-                    "error": f"Impossible d'annuler un dépôt {transaction.get_status_display()}",
-                    "code": "invalid_status"
-                }
+                # Vérification du statut
+                if transaction.status not in ['pending', 'processing']:
+                    return {
+                        "success": False,
+                        "error": f"Impossible d'annuler un dépôt {transaction.get_status_display()}",
+                        "code": "invalid_status"
+                    }
 
-            with db_transaction.atomic():
                 # Annuler la transaction
                 transaction.mark_cancelled(
                     reason=cancellation_data.get("reason"),
@@ -845,22 +882,22 @@ class WalletService:
             # Récupération du wallet
             wallet = WalletService.get_or_create_wallet(user)
 
-            # Récupération de la transaction
-            transaction = wallet.transactions.get(
-                id=transaction_id,
-                transaction_type='withdrawal'
-            )
+            with db_transaction.atomic():
+                # Récupération de la transaction, verrouillée (voir confirm_deposit)
+                transaction = wallet.transactions.select_for_update().get(
+                    id=transaction_id,
+                    transaction_type='withdrawal'
+                )
 
-            # Vérification du statut
-            if transaction.status not in ['pending', 'processing']:
-                return {
-                    "success": False,
-                    "error": f"Impossible de confirmer un retrait {transaction.get_status_display()}",
-                    "code": "invalid_status"
-                }
+                # Vérification du statut
+                if transaction.status not in ['pending', 'processing']:
+                    return {
+                        "success": False,
+                        "error": f"Impossible de confirmer un retrait {transaction.get_status_display()}",
+                        "code": "invalid_status"
+                    }
 
-            # Marquer comme terminé (le débit a déjà été fait à l'initiation)
-            with db_transaction.atomic():
+                # Marquer comme terminé (le débit a déjà été fait à l'initiation)
                 transaction.status = 'completed'
                 transaction.completed_at = timezone.now()
                 transaction.save()
@@ -911,21 +948,21 @@ class WalletService:
             # Récupération du wallet
             wallet = WalletService.get_or_create_wallet(user)
 
-            # Récupération de la transaction
-            transaction = wallet.transactions.get(
-                id=transaction_id,
-                transaction_type='withdrawal'
-            )
+            with db_transaction.atomic():
+                # Récupération de la transaction, verrouillée (voir confirm_deposit)
+                transaction = wallet.transactions.select_for_update().get(
+                    id=transaction_id,
+                    transaction_type='withdrawal'
+                )
 
-            # Vérification du statut
-            if transaction.status not in ['pending', 'processing']:
-                return {
-                    "success": False,
-                    "error": f"Impossible d'annuler un retrait {transaction.get_status_display()}",
-                    "code": "invalid_status"
-                }
+                # Vérification du statut
+                if transaction.status not in ['pending', 'processing']:
+                    return {
+                        "success": False,
+                        "error": f"Impossible d'annuler un retrait {transaction.get_status_display()}",
+                        "code": "invalid_status"
+                    }
 
-            with db_transaction.atomic():
                 # Calculer le montant à rembourser (montant + frais)
                 total_amount = Decimal(str(transaction.amount_cents + transaction.fee_cents)) / Decimal('100')
 
@@ -987,16 +1024,23 @@ class WalletService:
                     "code": "missing_flutterwave_id"
                 }
 
-            if transaction.transaction_type == 'deposit':
-                result = flutterwave_service.verify_transaction(
-                    transaction.flutterwave_transaction_id,
-                    payment_method=transaction.payment_method
-                )
-            else:  # withdrawal
-                result = flutterwave_service.verify_transfer(
-                    transaction.flutterwave_transaction_id,
-                    payment_method=transaction.payment_method
-                )
+            # Les sondages rapprochés d'une même transaction réutilisent la
+            # dernière réponse de Flutterwave au lieu de refaire l'appel HTTP
+            cache_key = f"fw_status:{transaction.id}"
+            result = cache.get(cache_key)
+            if result is None:
+                if transaction.transaction_type == 'deposit':
+                    result = flutterwave_service.verify_transaction(
+                        transaction.flutterwave_transaction_id,
+                        payment_method=transaction.payment_method
+                    )
+                else:  # withdrawal
+                    result = flutterwave_service.verify_transfer(
+                        transaction.flutterwave_transaction_id,
+                        payment_method=transaction.payment_method
+                    )
+                if result["success"]:
+                    cache.set(cache_key, result, FLUTTERWAVE_STATUS_CACHE_TIMEOUT)
 
             if result["success"]:
                 # Mapper le statut Flutterwave vers notre statut
@@ -1012,11 +1056,17 @@ class WalletService:
                         WalletService.confirm_withdrawal(transaction.wallet.user, transaction.id)
                     # Rafraîchir la transaction
                     transaction.refresh_from_db()
-                elif mapped_status in ["failed", "cancelled"] and transaction.status not in ["failed", "cancelled"]:
-                    transaction.mark_failed(
-                        error_message=f"Flutterwave status: {flutterwave_status}",
-                        error_code="flutterwave_status_update"
-                    )
+                elif mapped_status in ["failed", "cancelled"] and transaction.status in ["pending", "processing"]:
+                    # Verrou et statut revérifié : un webhook concurrent a pu
+                    # terminer la transaction depuis la lecture de l'instance
+                    with db_transaction.atomic():
+                        locked = Transaction.objects.select_for_update().get(id=transaction.id)
+                        if locked.status in ("pending", "processing"):
+                            locked.mark_failed(
+                                error_message=f"Flutterwave status: {flutterwave_status}",
+                                error_code="flutterwave_status_update"
+                            )
+                    transaction.refresh_from_db()
 
             return result
 
@@ -1044,26 +1094,28 @@ class WalletService:
             dict: Résultat de l'opération
         """
         try:
-            transaction = Transaction.objects.get(id=transaction_id)
-            old_status = transaction.status
-
-            # Validation des transitions de statut
-            valid_transitions = {
-                'pending': ['processing', 'completed', 'failed', 'cancelled'],
-                'processing': ['completed', 'failed', 'cancelled'],
-                'completed': [],  # Ne peut pas changer une fois terminée
-                'failed': ['pending'],  # Peut être relancée
-                'cancelled': ['pending']  # Peut être relancée
-            }
-
-            if new_status not in valid_transitions.get(old_status, []):
-                return {
-                    "success": False,
-                    "error": f"Transition de statut invalide: {old_status} -> {new_status}",
-                    "code": "invalid_status_transition"
+            # Verrou sur la ligne et transition validée sous le verrou : une
+            # mise à jour admin ne peut pas croiser un webhook ou une confirmation
+            with db_transaction.atomic():
+                transaction = Transaction.objects.select_for_update().get(id=transaction_id)
+                old_status = transaction.status
+
+                # Validation des transitions de statut
+                valid_transitions = {
+                    'pending': ['processing', 'completed', 'failed', 'cancelled'],
+                    'processing': ['completed', 'failed', 'cancelled'],
+                    'completed': [],  # Ne peut pas changer une fois terminée
+                    'failed': ['pending'],  # Peut être relancée
+                    'cancelled': ['pending']  # Peut être relancée
                 }
 
-            with db_transaction.atomic():
+                if new_status not in valid_transitions.get(old_status, []):
+                    return {
+                        "success": False,
+                        "error": f"Transition de statut invalide: {old_status} -> {new_status}",
+                        "code": "invalid_status_transition"
+                    }
+
                 if new_status == 'completed':
                     transaction.mark_completed()
                 elif new_status == 'failed':
@@ -1117,12 +1169,12 @@ class WalletService:
             dict: Statistiques
         """
         try:
-            total_wallets = Wallet.objects.count()
-            total_balance = Wallet.objects.aggregate(
-                total=Sum('balance_cents')
-            )['total'] or 0
-            # Convertir de centimes en unités
-            total_balance = total_balance / 100 if total_balance else 0
+            # Nombre et solde total des wallets en une seule requête
+            wallets_stats = Wallet.objects.aggregate(
+                total_count=Count('id'),
+                total_balance=Coalesce(Sum('balance_cents'), 0)
+            )
+            total_wallets = wallets_stats['total_count']
 
             transactions_stats = Transaction.objects.aggregate(
                 total_count=Count('id'),
@@ -1131,8 +1183,8 @@ class WalletService:
                 completed_count=Count('id', filter=Q(status='completed')),
                 pending_count=Count('id', filter=Q(status='pending')),
                 failed_count=Count('id', filter=Q(status='failed')),
-                total_volume=Sum('amount_cents', filter=Q(status='completed')) or 0,
-                total_fees=Sum('fee_cents', filter=Q(status='completed')) or 0
+                total_volume=Coalesce(Sum('amount_cents', filter=Q(status='completed')), 0),
+                total_fees=Coalesce(Sum('fee_cents', filter=Q(status='completed')), 0)
             )
 
             # Volume par devise
@@ -1143,13 +1195,13 @@ class WalletService:
             ):
                 currency = currency_data['currency']
                 volume_by_currency[currency] = {
-                    'volume': currency_data['volume'] / 100,  # Convertir en unités
+                    'volume': CurrencyUtils.format_cents(currency_data['volume']),
                     'count': currency_data['count']
                 }
 
             return {
                 "total_wallets": total_wallets,
-                "total_balance": float(total_balance),
+                "total_balance": CurrencyUtils.format_cents(wallets_stats['total_balance']),
                 "transactions": {
                     "total": transactions_stats['total_count'],
                     "deposits": transactions_stats['deposits_count'],
@@ -1157,8 +1209,8 @@ class WalletService:
                     "completed": transactions_stats['completed_count'],
                     "pending": transactions_stats['pending_count'],
                     "failed": transactions_stats['failed_count'],
-                    "total_volume": transactions_stats['total_volume'] / 100,
-                    "total_fees": transactions_stats['total_fees'] / 100
+                    "total_volume": CurrencyUtils.format_cents(transactions_stats['total_volume']),
+                    "total_fees": CurrencyUtils.format_cents(transactions_stats['total_fees'])
                 },
                 "volume_by_currency": volume_by_currency,
                 "generated_at": timezone.now().isoformat()
@@ -1171,6 +1223,30 @@ class WalletService:
                 "generated_at": timezone.now().isoformat()
             }
 
+    @staticmethod
+    def get_cached_wallet_statistics():
+        """
+        Retourne les statistiques globales depuis le cache, en les recalculant si besoin
+
+        Le cache est invalidé à chaque sauvegarde d'un wallet ou d'une
+        transaction (voir signals.py) ; `generated_at` indique la date du calcul.
+
+        Returns:
+            dict: Statistiques
+        """
+        stats = cache.get(WALLET_STATS_CACHE_KEY)
+        if stats is None:
+            stats = WalletService.get_wallet_statistics()
+            # Une erreur de calcul n'est pas mise en cache
+            if "error" not in stats:
+                cache.set(WALLET_STATS_CACHE_KEY, stats, WALLET_STATS_CACHE_TIMEOUT)
+        return stats
+
+    @staticmethod
+    def invalidate_wallet_statistics():
+        """Supprime les statistiques globales du cache, au commit de la transaction en cours"""
+        db_transaction.on_commit(lambda: cache.delete(WALLET_STATS_CACHE_KEY))
+
 
 # Instance globale du service
 wallet_service = WalletService()
\ No newline at end of file
@@ -9,6 +9,7 @@ import structlog
 
 from ..models import PaymentMethod
 from ..Services.payment_method_service import payment_method_service
+from ..utils.cache import CacheUtils
 from ..Serializers.payment_method_serializers import (
     PaymentMethodSerializer,
     CreateCardPaymentMethodSerializer,
@@ -35,6 +36,16 @@ class PaymentMethodListView(APIView):
         method_type = request.query_params.get('method_type')  # card, bank_account, orange_money
         active_only = request.query_params.get('active_only', 'true').lower() == 'true'
         
+        # Requête conditionnelle : la version est invalidée à chaque mutation
+        etag = CacheUtils.make_etag(
+            CacheUtils.get_version('payment_methods', request.user.id),
+            method_type,
+            active_only
+        )
+        not_modified = CacheUtils.not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+        
         payment_methods = payment_method_service.list_payment_methods(
             user=request.user,
             method_type=method_type,
@@ -43,11 +54,12 @@ class PaymentMethodListView(APIView):
         
         serializer = PaymentMethodSerializer(payment_methods, many=True)
         
-        return Response({
+        response = Response({
             "success": True,
             "payment_methods": serializer.data,
             "count": len(serializer.data)
         }, status=status.HTTP_200_OK)
+        return CacheUtils.set_etag(response, etag)
 
     def post(self, request):
         """Crée une méthode de paiement"""
@@ -66,12 +78,7 @@ class PaymentMethodListView(APIView):
                 "code": "invalid_method_type"
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        if not serializer.is_valid():
-            return Response({
-                "success": False,
-                "error": "Données invalides",
-                "details": serializer.errors
-            }, status=status.HTTP_400_BAD_REQUEST)
+        serializer.is_valid(raise_exception=True)
         
         try:
             if method_type == 'card':
@@ -168,37 +175,34 @@ class PaymentMethodDetailView(APIView):
 
     def patch(self, request, payment_method_id):
         """Met à jour une méthode de paiement"""
+        # Validation avant toute requête en base
+        serializer = UpdatePaymentMethodSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
         try:
             payment_method = payment_method_service.get_payment_method(
                 request.user, payment_method_id
             )
             
-            serializer = UpdatePaymentMethodSerializer(data=request.data)
-            if not serializer.is_valid():
-                return Response({
-                    "success": False,
-                    "error": "Données invalides",
-                    "details": serializer.errors
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
             validated_data = serializer.validated_data
+            update_fields = []
             
             # Mise à jour des champs
             if 'label' in validated_data:
                 payment_method.label = validated_data['label']
-            if 'is_default' in validated_data:
-                # Si on définit comme défaut, désactiver les autres
-                if validated_data['is_default']:
-                    PaymentMethod.objects.filter(
-                        user=request.user,
-                        method_type=payment_method.method_type,
-                        is_default=True
-                    ).exclude(id=payment_method.id).update(is_default=False)
-                payment_method.is_default = validated_data['is_default']
+                update_fields.append('label')
             if 'is_active' in validated_data:
                 payment_method.is_active = validated_data['is_active']
+                update_fields.append('is_active')
+            if validated_data.get('is_default'):
+                # Bascule atomique : celle-ci à True, les autres du même type à False
+                payment_method_service.set_default_payment_method(request.user, payment_method)
+            elif 'is_default' in validated_data:
+                payment_method.is_default = False
+                update_fields.append('is_default')
             
-            payment_method.save()
+            if update_fields:
+                payment_method.save(update_fields=update_fields + ['updated_at'])
             
             result_serializer = PaymentMethodSerializer(payment_method)
             
@@ -265,16 +269,8 @@ class PaymentMethodSetDefaultView(APIView):
                 request.user, payment_method_id
             )
             
-            # Désactiver les autres méthodes par défaut du même type
-            PaymentMethod.objects.filter(
-                user=request.user,
-                method_type=payment_method.method_type,
-                is_default=True
-            ).exclude(id=payment_method.id).update(is_default=False)
-            
-            # Définir celle-ci comme défaut
-            payment_method.is_default = True
-            payment_method.save()
+            # Définir celle-ci comme défaut et désactiver les autres du même type
+            payment_method_service.set_default_payment_method(request.user, payment_method)
             
             logger.info(
                 "payment_method_set_default",
@@ -2,26 +2,100 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+import json
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Count, Q, Window
 import structlog
 
-from ..models import Wallet, Transaction
+from ..models import Transaction
 from Accounts.utils import auth_utils
 from ..Services.wallet_service import wallet_service, WalletService
+from ..Services.flutterwave_service import flutterwave_service
 from ..Serializers.wallet_serializers import (
-    WalletSerializer,
+    WalletDetailSerializer,
     TransactionSerializer,
     DepositSerializer,
     WithdrawalSerializer,
     TransactionListSerializer,
     TransactionConfirmSerializer,
     TransactionCancelSerializer,
-    TransactionStatusUpdateSerializer
+    TransactionStatusUpdateSerializer,
+    FeeEstimateSerializer
 )
+from ..utils.cache import CacheUtils
+from ..utils.currency import CurrencyUtils
 
 logger = structlog.get_logger(__name__)
 
+# Durée de vie (secondes) des pages d'historique mises en cache
+TRANSACTION_LIST_CACHE_TIMEOUT = 10
+
+# Durée de vie (secondes) de la représentation du portefeuille en cache
+WALLET_VIEW_CACHE_TIMEOUT = 300
+
+# Durée de vie (secondes) du verrou de retrait en cours, libéré en fin de requête.
+# Couvre le pire cas d'un appel Flutterwave (délai réseau à chaque tentative et
+# attentes entre tentatives) plus une marge pour le travail en base
+WITHDRAWAL_INFLIGHT_MARGIN = 30
+WITHDRAWAL_INFLIGHT_TIMEOUT = (
+    settings.FLUTTERWAVE_TIMEOUT * settings.FLUTTERWAVE_MAX_RETRIES
+    + settings.FLUTTERWAVE_RETRY_DELAY * sum(range(settings.FLUTTERWAVE_MAX_RETRIES))
+    + WITHDRAWAL_INFLIGHT_MARGIN
+)
+
+# Actions proposées par TransactionStatusView, précalculées par (action, type de transaction)
+NEXT_ACTIONS = {
+    (action, transaction_type): {
+        "action": action,
+        "method": "POST",
+        "endpoint": f"/api/wallet/{transaction_type}/{{transaction_id}}/{action}/",
+        "description": f"{verb} ce {transaction_type_display}"
+    }
+    for action, verb in (('cancel', 'Annuler'), ('confirm', 'Confirmer'))
+    for transaction_type, transaction_type_display in Transaction.TRANSACTION_TYPES
+}
+
+
+def _error_response(error, code=None, status_code=status.HTTP_400_BAD_REQUEST, **extra):
+    """
+    Construit une réponse d'erreur au format standard de l'API
+
+    Args:
+        error: Message d'erreur
+        code: Code d'erreur machine (omis si None)
+        status_code: Statut HTTP
+        **extra: Champs additionnels (details, available_balance, ...)
+    """
+    payload = {"success": False, "error": error}
+    if code is not None:
+        payload["code"] = code
+    payload.update(extra)
+    return Response(payload, status=status_code)
+
+
+def _service_error_response(result, *extra_keys):
+    """
+    Convertit un résultat d'échec du wallet_service en réponse d'erreur
+
+    Args:
+        result: Dict retourné par le service ({"success": False, "error", "code", ...})
+        *extra_keys: Clés de montants du résultat à recopier dans la réponse
+            (rendus en chaînes exactes, None si absents)
+    """
+    extra = {}
+    for key in extra_keys:
+        value = result.get(key)
+        extra[key] = CurrencyUtils.format_amount(value) if value is not None else None
+    return _error_response(
+        result.get("error"),
+        result.get("code"),
+        result.get("status_code", status.HTTP_400_BAD_REQUEST),
+        **extra
+    )
+
 
 class WalletView(APIView):
     """
@@ -33,27 +107,52 @@ class WalletView(APIView):
     def get(self, request):
         wallet = wallet_service.get_or_create_wallet(request.user)
 
-        serializer = WalletSerializer(wallet)
-        data = serializer.data
-
-        # Ajout d'informations supplémentaires
-        data['transactions_count'] = wallet.transactions.count()
-        data['recent_transactions'] = TransactionSerializer(
-            wallet.transactions.order_by('-created_at')[:5],
-            many=True
-        ).data
-        data['currency_info'] = {
-            'code': wallet.currency,
-            'symbol': WalletService._get_currency_symbol(wallet.currency),
-            'name': WalletService._get_currency_name(wallet.currency)
-        }
+        # Requête conditionnelle : le solde, la version des transactions et celle
+        # des méthodes de paiement (imbriquées dans chaque transaction) suffisent
+        # à décider si la représentation a changé
+        etag = CacheUtils.make_etag(
+            'wallet',
+            wallet.id,
+            wallet.balance_cents,
+            wallet.currency,
+            wallet.is_active,
+            wallet.updated_at.isoformat(),
+            request.user.full_phone_number,
+            CacheUtils.get_version('transactions', wallet.id),
+            CacheUtils.get_version('payment_methods', request.user.id)
+        )
+        not_modified = CacheUtils.not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        # L'ETag change à chaque mutation du wallet ou de ses transactions :
+        # la clé de cache qui l'inclut est invalidée d'elle-même. Les versions
+        # ne changent qu'au commit, donc des lignes d'avant commit ne peuvent
+        # pas être mises en cache sous la nouvelle version
+        cache_key = f"wallet_view:{wallet.id}:{etag}"
+        data = cache.get(cache_key)
+        if data is None:
+            # Les 5 dernières transactions et le total en une requête
+            # (COUNT(*) OVER ()), puis une seule passe de sérialisation
+            wallet.recent_tx = list(
+                wallet.transactions
+                .select_related('payment_method_saved')
+                .only('wallet', *TransactionSerializer.QUERY_FIELDS)
+                .annotate(total_count=Window(expression=Count('id')))
+                .order_by('-created_at', '-id')[:5]
+            )
+            wallet.tx_count = wallet.recent_tx[0].total_count if wallet.recent_tx else 0
 
-        logger.info("wallet_viewed", user_id=str(request.user.id), balance=wallet.balance)
+            data = WalletDetailSerializer(wallet).data
+            cache.set(cache_key, data, WALLET_VIEW_CACHE_TIMEOUT)
 
-        return Response({
+        logger.debug("wallet_viewed", user_id=str(request.user.id), balance=wallet.balance)
+
+        response = Response({
             "success": True,
             "wallet": data
         }, status=status.HTTP_200_OK)
+        return CacheUtils.set_etag(response, etag)
 
 
 class DepositView(APIView):
@@ -65,17 +164,7 @@ class DepositView(APIView):
 
     def post(self, request):
         serializer = DepositSerializer(data=request.data)
-        if not serializer.is_valid():
-            logger.warning(
-                "deposit_validation_failed",
-                user_id=str(request.user.id),
-                errors=serializer.errors
-            )
-            return Response({
-                "success": False,
-                "error": "Données invalides",
-                "details": serializer.errors
-            }, status=status.HTTP_400_BAD_REQUEST)
+        serializer.is_valid(raise_exception=True)
 
         # Extraction sécurisée des métadonnées (IP réelle, Agent, etc.)
         request_meta = auth_utils.extract_request_metadata(request)
@@ -89,11 +178,7 @@ class DepositView(APIView):
             # Si payment_method_id fourni, on a juste besoin du CVV
             if payment_method_id:
                 if not validated_data.get('card_cvv'):
-                    return Response({
-                        "success": False,
-                        "error": "CVV requis même avec une méthode sauvegardée",
-                        "code": "cvv_required"
-                    }, status=status.HTTP_400_BAD_REQUEST)
+                    return _error_response("CVV requis même avec une méthode sauvegardée", "cvv_required")
                 card_details = {
                     'cvv': validated_data['card_cvv']
                 }
@@ -119,12 +204,7 @@ class DepositView(APIView):
         )
 
         if not result["success"]:
-            return Response({
-                "success": False,
-                "error": result.get("error"),
-                "code": result.get("code"),
-                "available_balance": result.get("available_balance")
-            }, status=result.get("status_code", status.HTTP_400_BAD_REQUEST))
+            return _service_error_response(result, "available_balance")
 
         # Sérialisation de la transaction
         transaction_data = TransactionSerializer(result["transaction"]).data
@@ -143,15 +223,11 @@ class DepositView(APIView):
             "transaction": transaction_data,
             "payment_link": result["payment_link"],
             "reference": result["reference"],
-            "amount": result["amount"],
-            "fee": result["fee"],
-            "total": result["total"],
+            "amount": CurrencyUtils.format_amount(result["amount"]),
+            "fee": CurrencyUtils.format_amount(result["fee"]),
+            "total": CurrencyUtils.format_amount(result["total"]),
             "currency": result.get("currency", "EUR"),
-            "currency_info": {
-                "code": result.get("currency", "EUR"),
-                "symbol": WalletService._get_currency_symbol(result.get("currency", "EUR")),
-                "name": WalletService._get_currency_name(result.get("currency", "EUR"))
-            },
+            "currency_info": CurrencyUtils.get_info(result.get("currency", "EUR")),
             "expires_in": 1800  # 30 minutes
         }, status=status.HTTP_201_CREATED)
 
@@ -165,17 +241,7 @@ class WithdrawalView(APIView):
 
     def post(self, request):
         serializer = WithdrawalSerializer(data=request.data)
-        if not serializer.is_valid():
-            logger.warning(
-                "withdrawal_validation_failed",
-                user_id=str(request.user.id),
-                errors=serializer.errors
-            )
-            return Response({
-                "success": False,
-                "error": "Données invalides",
-                "details": serializer.errors
-            }, status=status.HTTP_400_BAD_REQUEST)
+        serializer.is_valid(raise_exception=True)
 
         # Préparation des détails du compte selon la méthode
         validated_data = serializer.validated_data
@@ -185,12 +251,16 @@ class WithdrawalView(APIView):
         # Si payment_method_id fourni, account_details sera construit dans wallet_service
         account_details = None
         if not payment_method_id:
+            # Nom par défaut du bénéficiaire, calculé une seule fois pour les deux méthodes
+            user = request.user
+            default_name = user.get_display_name()
+
             if payment_method == 'card':
                 # Retrait vers compte bancaire
                 account_details = {
                     'account_number': validated_data['account_number'],
                     'bank_code': validated_data['bank_code'],
-                    'account_name': validated_data.get('account_name') or f"{request.user.first_name} {request.user.last_name}".strip() or request.user.full_phone_number,
+                    'account_name': validated_data.get('account_name') or default_name,
                     'bank_name': validated_data.get('bank_name'),
                     'bank_country': validated_data.get('bank_country'),
                     'type': 'bank_account'  # Type par défaut
@@ -198,31 +268,40 @@ class WithdrawalView(APIView):
             elif payment_method == 'orange_money':
                 account_details = {
                     'phone_number': validated_data['orange_money_number'],
-                    'beneficiary_name': f"{request.user.first_name} {request.user.last_name}".strip() or request.user.full_phone_number
+                    'beneficiary_name': default_name
                 }
 
         # Extraction sécurisée des métadonnées (IP réelle, Agent, etc.)
         request_meta = auth_utils.extract_request_metadata(request)
 
-        result = wallet_service.initiate_withdrawal(
-            user=request.user,
-            amount=validated_data['amount'],
-            payment_method=payment_method,
-            account_details=account_details,
-            request_meta=request_meta,
-            payment_method_id=payment_method_id,
-            save_payment_method=validated_data.get('save_payment_method', False),
-            payment_method_label=validated_data.get('payment_method_label')
-        )
+        # Un seul retrait en cours par utilisateur (wallet unique) : les requêtes
+        # parallèles sont refusées au lieu de déclencher plusieurs appels fournisseur.
+        # Exclusion entre workers seulement avec un cache partagé (voir CACHES)
+        inflight_key = f"withdrawal_inflight:{request.user.id}"
+        inflight_token = CacheUtils.acquire_lock(inflight_key, WITHDRAWAL_INFLIGHT_TIMEOUT)
+        if inflight_token is None:
+            return _error_response(
+                "Un retrait est déjà en cours de traitement",
+                "withdrawal_in_progress",
+                status.HTTP_429_TOO_MANY_REQUESTS
+            )
+
+        try:
+            result = wallet_service.initiate_withdrawal(
+                user=request.user,
+                amount=validated_data['amount'],
+                payment_method=payment_method,
+                account_details=account_details,
+                request_meta=request_meta,
+                payment_method_id=payment_method_id,
+                save_payment_method=validated_data.get('save_payment_method', False),
+                payment_method_label=validated_data.get('payment_method_label')
+            )
+        finally:
+            CacheUtils.release_lock(inflight_key, inflight_token)
 
         if not result["success"]:
-            return Response({
-                "success": False,
-                "error": result.get("error"),
-                "code": result.get("code"),
-                "available_balance": result.get("available_balance"),
-                "required_amount": result.get("required_amount")
-            }, status=status.HTTP_400_BAD_REQUEST)
+            return _service_error_response(result, "available_balance", "required_amount")
 
         # Sérialisation de la transaction
         transaction_data = TransactionSerializer(result["transaction"]).data
@@ -240,15 +319,11 @@ class WithdrawalView(APIView):
             "message": "Retrait initié avec succès",
             "transaction": transaction_data,
             "reference": result["reference"],
-            "amount": result["amount"],
-            "fee": result["fee"],
-            "total_deducted": result["total_deducted"],
-            "currency": result.get("currency", request.user.wallet.currency),
-            "currency_info": {
-                "code": result.get("currency", request.user.wallet.currency),
-                "symbol": WalletService._get_currency_symbol(result.get("currency", request.user.wallet.currency)),
-                "name": WalletService._get_currency_name(result.get("currency", request.user.wallet.currency))
-            }
+            "amount": CurrencyUtils.format_amount(result["amount"]),
+            "fee": CurrencyUtils.format_amount(result["fee"]),
+            "total_deducted": CurrencyUtils.format_amount(result["total_deducted"]),
+            "currency": result["currency"],
+            "currency_info": CurrencyUtils.get_info(result["currency"])
         }, status=status.HTTP_201_CREATED)
 
 
@@ -263,57 +338,113 @@ class TransactionListView(APIView):
         # Validation des paramètres de filtrage
         filter_serializer = TransactionListSerializer(data=request.query_params)
         if not filter_serializer.is_valid():
-            return Response({
-                "success": False,
-                "error": "Paramètres de filtrage invalides",
-                "details": filter_serializer.errors
-            }, status=status.HTTP_400_BAD_REQUEST)
+            return _error_response("Paramètres de filtrage invalides", details=filter_serializer.errors)
 
         filters = filter_serializer.validated_data
 
         # Récupération du wallet
         wallet = wallet_service.get_or_create_wallet(request.user)
 
-        # Construction de la requête
-        queryset = wallet.transactions.all()
-
-        # Application des filtres
-        if filters.get('transaction_type'):
-            queryset = queryset.filter(transaction_type=filters['transaction_type'])
-
-        if filters.get('status'):
-            queryset = queryset.filter(status=filters['status'])
+        # Cache court par wallet et par jeu de filtres ; les versions sont
+        # invalidées à chaque sauvegarde d'une transaction du wallet ou d'une
+        # méthode de paiement (payment_method_saved_info) de l'utilisateur.
+        # La même empreinte sert d'ETag pour les requêtes conditionnelles.
+        etag = CacheUtils.make_etag(
+            CacheUtils.get_version('transactions', wallet.id),
+            CacheUtils.get_version('payment_methods', request.user.id),
+            *sorted(filters.items())
+        )
+        not_modified = CacheUtils.not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        cache_key = f"tx_list:{wallet.id}:{etag}"
+        payload = cache.get(cache_key)
+        if payload is not None:
+            return CacheUtils.set_etag(Response(payload, status=status.HTTP_200_OK), etag)
+
+        # Construction de la requête (payment_method_saved est sérialisé pour chaque ligne,
+        # seules les colonnes lues par le sérialiseur sont chargées ; wallet_id est
+        # conservé car le related manager le lit pour rattacher chaque ligne au wallet)
+        queryset = wallet.transactions.select_related('payment_method_saved').only(
+            'wallet', *TransactionSerializer.QUERY_FIELDS
+        )
 
-        if filters.get('payment_method'):
-            queryset = queryset.filter(payment_method=filters['payment_method'])
+        # Application des filtres, rassemblés en un seul appel à filter()
+        lookups = {
+            field: filters[field]
+            for field in ('transaction_type', 'status', 'payment_method')
+            if filters.get(field)
+        }
 
+        # Bornes explicites sur created_at (un lookup __date empêcherait
+        # l'utilisation des index)
         if filters.get('date_from'):
-            queryset = queryset.filter(created_at__date__gte=filters['date_from'])
+            lookups['created_at__gte'] = timezone.make_aware(datetime.combine(filters['date_from'], time.min))
 
         if filters.get('date_to'):
-            queryset = queryset.filter(created_at__date__lte=filters['date_to'])
+            lookups['created_at__lt'] = timezone.make_aware(
+                datetime.combine(filters['date_to'] + timedelta(days=1), time.min)
+            )
 
-        # Pagination
+        if lookups:
+            queryset = queryset.filter(**lookups)
+
+        # Pagination (ordre total : created_at puis id pour départager les égalités)
         limit = filters.get('limit', 20)
-        offset = filters.get('offset', 0)
-        total_count = queryset.count()
+        queryset = queryset.order_by('-created_at', '-id')
+        cursor = filters.get('cursor')
+
+        if cursor:
+            # Pagination par curseur (keyset) : ni OFFSET ni COUNT
+            cursor_created_at, cursor_id = cursor
+            queryset = queryset.filter(
+                Q(created_at__lt=cursor_created_at) |
+                Q(created_at=cursor_created_at, id__lt=cursor_id)
+            )
+            rows = list(queryset[:limit + 1])
+            has_more = len(rows) > limit
+            transactions = rows[:limit]
+            pagination = {
+                "limit": limit,
+                "has_more": has_more
+            }
+        else:
+            offset = filters.get('offset', 0)
+            # Page et total en une seule requête (COUNT(*) OVER ())
+            transactions = list(
+                queryset.annotate(total_count=Window(expression=Count('id')))[offset:offset + limit]
+            )
+            if transactions:
+                total_count = transactions[0].total_count
+            else:
+                # Page vide : le total n'est connu qu'au-delà de la première page
+                total_count = queryset.count() if offset else 0
+            has_more = offset + limit < total_count
+            pagination = {
+                "total_count": total_count,
+                "limit": limit,
+                "offset": offset,
+                "has_more": has_more
+            }
 
-        transactions = queryset.order_by('-created_at')[offset:offset + limit]
+        pagination["next_cursor"] = (
+            TransactionListSerializer.encode_cursor(transactions[-1])
+            if has_more and transactions else None
+        )
 
         # Sérialisation
         serializer = TransactionSerializer(transactions, many=True)
 
-        return Response({
+        payload = {
             "success": True,
             "transactions": serializer.data,
-            "pagination": {
-                "total_count": total_count,
-                "limit": limit,
-                "offset": offset,
-                "has_more": offset + limit < total_count
-            },
-            "filters_applied": filters
-        }, status=status.HTTP_200_OK)
+            "pagination": pagination,
+            "filters_applied": {key: value for key, value in filters.items() if key != 'cursor'}
+        }
+        cache.set(cache_key, payload, TRANSACTION_LIST_CACHE_TIMEOUT)
+
+        return CacheUtils.set_etag(Response(payload, status=status.HTTP_200_OK), etag)
 
 
 class TransactionDetailView(APIView):
@@ -325,11 +456,14 @@ class TransactionDetailView(APIView):
 
     def get(self, request, transaction_id):
         try:
-            # Récupération du wallet de l'utilisateur
-            wallet = wallet_service.get_or_create_wallet(request.user)
-
-            # Récupération de la transaction (sécurisée par wallet)
-            transaction = wallet.transactions.get(id=transaction_id)
+            # Récupération de la transaction (sécurisée par le propriétaire du wallet),
+            # limitée aux colonnes rendues par le sérialiseur
+            transaction = Transaction.objects.select_related('payment_method_saved').only(
+                *TransactionSerializer.QUERY_FIELDS
+            ).get(
+                id=transaction_id,
+                wallet__user=request.user
+            )
 
             serializer = TransactionSerializer(transaction)
 
@@ -339,11 +473,7 @@ class TransactionDetailView(APIView):
             }, status=status.HTTP_200_OK)
 
         except Transaction.DoesNotExist:
-            return Response({
-                "success": False,
-                "error": "Transaction non trouvée",
-                "code": "transaction_not_found"
-            }, status=status.HTTP_404_NOT_FOUND)
+            return _error_response("Transaction non trouvée", "transaction_not_found", status.HTTP_404_NOT_FOUND)
 
 
 class FlutterwaveWebhookView(APIView):
@@ -352,6 +482,7 @@ class FlutterwaveWebhookView(APIView):
     Webhook pour recevoir les notifications Flutterwave
     """
     permission_classes = []  # Pas d'authentification pour les webhooks
+    parser_classes = []  # Le corps brut est lu et décodé une seule fois dans post()
 
     def post(self, request):
         """
@@ -366,12 +497,9 @@ class FlutterwaveWebhookView(APIView):
             # Récupérer le corps brut pour la vérification
             raw_body = request.body
             
-            # Vérifier la signature si configurée
-            from Wallet.Services.flutterwave.base import FlutterwaveBaseService
-            base_service = FlutterwaveBaseService()
-            
-            if base_service.webhook_secret and signature:
-                if not base_service.verify_webhook_signature(raw_body, signature):
+            # Vérifier la signature si configurée (instance partagée du service)
+            if flutterwave_service.webhook_secret and signature:
+                if not flutterwave_service.verify_webhook_signature(raw_body, signature):
                     logger.warning(
                         "webhook_signature_invalid",
                         signature_provided=signature[:20] + "..." if signature else None
@@ -380,18 +508,28 @@ class FlutterwaveWebhookView(APIView):
                         {"status": "error", "message": "Invalid signature"},
                         status=status.HTTP_401_UNAUTHORIZED
                     )
-            elif base_service.webhook_secret and not signature:
+            elif flutterwave_service.webhook_secret and not signature:
                 logger.warning("webhook_signature_missing")
                 return Response(
                     {"status": "error", "message": "Signature required"},
                     status=status.HTTP_401_UNAUTHORIZED
                 )
 
-            webhook_data = request.data
+            # Décodage unique du corps déjà lu pour la signature
+            try:
+                webhook_data = json.loads(raw_body)
+            except ValueError:
+                webhook_data = None
+            if not isinstance(webhook_data, dict):
+                logger.warning("webhook_invalid_payload")
+                return Response(
+                    {"status": "error", "message": "Invalid payload"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
             logger.info(
                 "webhook_received",
-                event=webhook_data.get("event"),
+                webhook_event=webhook_data.get("event"),
                 data_id=webhook_data.get("data", {}).get("id"),
                 signature_valid=True
             )
@@ -423,12 +561,7 @@ class ConfirmDepositView(APIView):
 
     def post(self, request, transaction_id):
         serializer = TransactionConfirmSerializer(data=request.data)
-        if not serializer.is_valid():
-            return Response({
-                "success": False,
-                "error": "Données invalides",
-                "details": serializer.errors
-            }, status=status.HTTP_400_BAD_REQUEST)
+        serializer.is_valid(raise_exception=True)
 
         result = wallet_service.confirm_deposit(
             user=request.user,
@@ -437,11 +570,7 @@ class ConfirmDepositView(APIView):
         )
 
         if not result["success"]:
-            return Response({
-                "success": False,
-                "error": result.get("error"),
-                "code": result.get("code")
-            }, status=result.get("status_code", status.HTTP_400_BAD_REQUEST))
+            return _service_error_response(result)
 
         logger.info(
             "deposit_confirmed",
@@ -454,8 +583,8 @@ class ConfirmDepositView(APIView):
             "success": True,
             "message": "Dépôt confirmé avec succès",
             "transaction": TransactionSerializer(result["transaction"]).data,
-            "wallet_balance": result.get("wallet_balance"),
-            "amount_credited": result.get("amount_credited")
+            "wallet_balance": CurrencyUtils.format_amount(result["wallet_balance"]),
+            "amount_credited": CurrencyUtils.format_amount(result["amount_credited"])
         }, status=status.HTTP_200_OK)
 
 
@@ -468,12 +597,7 @@ class CancelDepositView(APIView):
 
     def post(self, request, transaction_id):
         serializer = TransactionCancelSerializer(data=request.data)
-        if not serializer.is_valid():
-            return Response({
-                "success": False,
-                "error": "Données invalides",
-                "details": serializer.errors
-            }, status=status.HTTP_400_BAD_REQUEST)
+        serializer.is_valid(raise_exception=True)
 
         result = wallet_service.cancel_deposit(
             user=request.user,
@@ -482,11 +606,7 @@ class CancelDepositView(APIView):
         )
 
         if not result["success"]:
-            return Response({
-                "success": False,
-                "error": result.get("error"),
-                "code": result.get("code")
-            }, status=result.get("status_code", status.HTTP_400_BAD_REQUEST))
+            return _service_error_response(result)
 
         logger.info(
             "deposit_cancelled",
@@ -499,7 +619,7 @@ class CancelDepositView(APIView):
             "success": True,
             "message": "Dépôt annulé avec succès",
             "transaction": TransactionSerializer(result["transaction"]).data,
-            "refund_amount": result.get("refund_amount")
+            "refund_amount": CurrencyUtils.format_amount(result["refund_amount"])
         }, status=status.HTTP_200_OK)
 
 
@@ -512,12 +632,7 @@ class ConfirmWithdrawalView(APIView):
 
     def post(self, request, transaction_id):
         serializer = TransactionConfirmSerializer(data=request.data)
-        if not serializer.is_valid():
-            return Response({
-                "success": False,
-                "error": "Données invalides",
-                "details": serializer.errors
-            }, status=status.HTTP_400_BAD_REQUEST)
+        serializer.is_valid(raise_exception=True)
 
         result = wallet_service.confirm_withdrawal(
             user=request.user,
@@ -526,11 +641,7 @@ class ConfirmWithdrawalView(APIView):
         )
 
         if not result["success"]:
-            return Response({
-                "success": False,
-                "error": result.get("error"),
-                "code": result.get("code")
-            }, status=result.get("status_code", status.HTTP_400_BAD_REQUEST))
+            return _service_error_response(result)
 
         logger.info(
             "withdrawal_confirmed",
@@ -543,8 +654,8 @@ class ConfirmWithdrawalView(APIView):
             "success": True,
             "message": "Retrait confirmé avec succès",
             "transaction": TransactionSerializer(result["transaction"]).data,
-            "wallet_balance": result.get("wallet_balance"),
-            "amount_debited": result.get("amount_debited")
+            "wallet_balance": CurrencyUtils.format_amount(result["wallet_balance"]),
+            "amount_debited": CurrencyUtils.format_amount(result["amount_debited"])
         }, status=status.HTTP_200_OK)
 
 
@@ -557,12 +668,7 @@ class CancelWithdrawalView(APIView):
 
     def post(self, request, transaction_id):
         serializer = TransactionCancelSerializer(data=request.data)
-        if not serializer.is_valid():
-            return Response({
-                "success": False,
-                "error": "Données invalides",
-                "details": serializer.errors
-            }, status=status.HTTP_400_BAD_REQUEST)
+        serializer.is_valid(raise_exception=True)
 
         result = wallet_service.cancel_withdrawal(
             user=request.user,
@@ -571,11 +677,7 @@ class CancelWithdrawalView(APIView):
         )
 
         if not result["success"]:
-            return Response({
-                "success": False,
-                "error": result.get("error"),
-                "code": result.get("code")
-            }, status=result.get("status_code", status.HTTP_400_BAD_REQUEST))
+            return _service_error_response(result)
 
         logger.info(
             "withdrawal_cancelled",
@@ -588,8 +690,8 @@ class CancelWithdrawalView(APIView):
             "success": True,
             "message": "Retrait annulé avec succès",
             "transaction": TransactionSerializer(result["transaction"]).data,
-            "refund_amount": result.get("refund_amount"),
-            "wallet_balance": result.get("wallet_balance")
+            "refund_amount": CurrencyUtils.format_amount(result["refund_amount"]),
+            "wallet_balance": CurrencyUtils.format_amount(result["wallet_balance"])
         }, status=status.HTTP_200_OK)
 
 
@@ -602,11 +704,12 @@ class TransactionStatusView(APIView):
 
     def get(self, request, transaction_id):
         try:
-            # Récupération du wallet de l'utilisateur
-            wallet = wallet_service.get_or_create_wallet(request.user)
-
-            # Récupération de la transaction (sécurisée par wallet)
-            transaction = wallet.transactions.get(id=transaction_id)
+            # Récupération de la transaction, sécurisée par le propriétaire du
+            # wallet (une seule requête, sans chemin de création du wallet)
+            transaction = Transaction.objects.select_related('wallet', 'payment_method_saved').get(
+                id=transaction_id,
+                wallet__user=request.user
+            )
 
             # Vérification du statut auprès de Flutterwave si nécessaire
             flutterwave_status = None
@@ -627,31 +730,17 @@ class TransactionStatusView(APIView):
             }, status=status.HTTP_200_OK)
 
         except Transaction.DoesNotExist:
-            return Response({
-                "success": False,
-                "error": "Transaction non trouvée",
-                "code": "transaction_not_found"
-            }, status=status.HTTP_404_NOT_FOUND)
+            return _error_response("Transaction non trouvée", "transaction_not_found", status.HTTP_404_NOT_FOUND)
 
     def _get_next_actions(self, transaction, user):
         """Retourne les actions possibles pour cette transaction"""
         actions = []
 
         if transaction.status == 'pending':
-            actions.append({
-                "action": "cancel",
-                "method": "POST",
-                "endpoint": f"/api/wallet/{transaction.transaction_type}/{{transaction_id}}/cancel/",
-                "description": f"Annuler ce {transaction.get_transaction_type_display()}"
-            })
+            actions.append(dict(NEXT_ACTIONS[('cancel', transaction.transaction_type)]))
 
         if transaction.status == 'processing' and user.is_staff:
-            actions.append({
-                "action": "confirm",
-                "method": "POST",
-                "endpoint": f"/api/wallet/{transaction.transaction_type}/{{transaction_id}}/confirm/",
-                "description": f"Confirmer ce {transaction.get_transaction_type_display()}"
-            })
+            actions.append(dict(NEXT_ACTIONS[('confirm', transaction.transaction_type)]))
 
         return actions
 
@@ -666,12 +755,7 @@ class UpdateTransactionStatusView(APIView):
     def patch(self, request, transaction_id):
 
         serializer = TransactionStatusUpdateSerializer(data=request.data)
-        if not serializer.is_valid():
-            return Response({
-                "success": False,
-                "error": "Données invalides",
-                "details": serializer.errors
-            }, status=status.HTTP_400_BAD_REQUEST)
+        serializer.is_valid(raise_exception=True)
 
         result = wallet_service.update_transaction_status(
             transaction_id=transaction_id,
@@ -680,11 +764,7 @@ class UpdateTransactionStatusView(APIView):
         )
 
         if not result["success"]:
-            return Response({
-                "success": False,
-                "error": result.get("error"),
-                "code": result.get("code")
-            }, status=result.get("status_code", status.HTTP_400_BAD_REQUEST))
+            return _service_error_response(result)
 
         logger.info(
             "transaction_status_updated",
@@ -712,7 +792,7 @@ class WalletStatsView(APIView):
     
     def get(self, request):
 
-        stats = wallet_service.get_wallet_statistics()
+        stats = wallet_service.get_cached_wallet_statistics()
 
         return Response({
             "success": True,
@@ -729,16 +809,17 @@ class RetryTransactionView(APIView):
 
     def post(self, request, transaction_id):
         try:
-            wallet = wallet_service.get_or_create_wallet(request.user)
-            transaction = wallet.transactions.get(id=transaction_id)
+            transaction = Transaction.objects.select_related('wallet').get(
+                id=transaction_id,
+                wallet__user=request.user
+            )
 
             # Vérifier que la transaction peut être relancée
             if transaction.status not in ['failed', 'cancelled']:
-                return Response({
-                    "success": False,
-                    "error": f"Impossible de relancer une transaction {transaction.get_status_display()}",
-                    "code": "invalid_status_for_retry"
-                }, status=status.HTTP_400_BAD_REQUEST)
+                return _error_response(
+                    f"Impossible de relancer une transaction {transaction.get_status_display()}",
+                    "invalid_status_for_retry"
+                )
 
             # Vérifier le statut auprès de Flutterwave
             if transaction.flutterwave_transaction_id:
@@ -760,25 +841,17 @@ class RetryTransactionView(APIView):
 
             # Si on arrive ici, on doit relancer la transaction
             # Pour l'instant, on retourne une erreur car la relance nécessite les détails originaux
-            return Response({
-                "success": False,
-                "error": "La relance automatique n'est pas encore implémentée. Veuillez créer une nouvelle transaction.",
-                "code": "retry_not_implemented"
-            }, status=status.HTTP_501_NOT_IMPLEMENTED)
+            return _error_response(
+                "La relance automatique n'est pas encore implémentée. Veuillez créer une nouvelle transaction.",
+                "retry_not_implemented",
+                status.HTTP_501_NOT_IMPLEMENTED
+            )
 
         except Transaction.DoesNotExist:
-            return Response({
-                "success": False,
-                "error": "Transaction non trouvée",
-                "code": "transaction_not_found"
-            }, status=status.HTTP_404_NOT_FOUND)
+            return _error_response("Transaction non trouvée", "transaction_not_found", status.HTTP_404_NOT_FOUND)
         except Exception as e:
             logger.error("transaction_retry_error", error=str(e), transaction_id=str(transaction_id))
-            return Response({
-                "success": False,
-                "error": "Erreur lors de la relance",
-                "code": "retry_error"
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return _error_response("Erreur lors de la relance", "retry_error", status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 class EstimateFeesView(APIView):
@@ -800,64 +873,34 @@ class EstimateFeesView(APIView):
             "currency": "EUR" (optionnel, utilise celui du wallet si absent)
         }
         """
-        try:
-            amount = float(request.data.get('amount', 0))
-            transaction_type = request.data.get('transaction_type')
-            payment_method = request.data.get('payment_method')
-            
-            if not all([amount, transaction_type, payment_method]):
-                return Response({
-                    "success": False,
-                    "error": "amount, transaction_type et payment_method sont requis",
-                    "code": "missing_parameters"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            if transaction_type not in ['deposit', 'withdrawal']:
-                return Response({
-                    "success": False,
-                    "error": "transaction_type doit être 'deposit' ou 'withdrawal'",
-                    "code": "invalid_transaction_type"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Récupérer la devise du wallet
-            wallet = wallet_service.get_or_create_wallet(request.user)
-            currency = request.data.get('currency') or wallet.currency
-            
-            # Calculer les frais
-            if transaction_type == 'deposit':
-                fee = WalletService._calculate_deposit_fee(amount, payment_method, currency)
-            else:
-                fee = WalletService._calculate_withdrawal_fee(amount, payment_method, currency)
-            
-            total = amount + fee if transaction_type == 'deposit' else amount + fee
-            
-            return Response({
-                "success": True,
-                "estimation": {
-                    "amount": amount,
-                    "fee": float(fee),
-                    "total": float(total),
-                    "currency": currency,
-                    "currency_info": {
-                        "code": currency,
-                        "symbol": WalletService._get_currency_symbol(currency),
-                        "name": WalletService._get_currency_name(currency)
-                    },
-                    "transaction_type": transaction_type,
-                    "payment_method": payment_method
-                }
-            }, status=status.HTTP_200_OK)
+        serializer = FeeEstimateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        except ValueError as e:
-            return Response({
-                "success": False,
-                "error": "Montant invalide",
-                "code": "invalid_amount"
-            }, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            logger.error("fee_estimation_error", error=str(e))
-            return Response({
-                "success": False,
-                "error": "Erreur lors de l'estimation des frais",
-                "code": "estimation_error"
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        validated_data = serializer.validated_data
+        amount = validated_data['amount']
+        transaction_type = validated_data['transaction_type']
+        payment_method = validated_data['payment_method']
+
+        # Récupérer la devise du wallet
+        currency = validated_data.get('currency') or wallet_service.get_wallet_currency(request.user)
+
+        # Calculer les frais
+        if transaction_type == 'deposit':
+            fee = WalletService._calculate_deposit_fee(amount, payment_method, currency)
+        else:
+            fee = WalletService._calculate_withdrawal_fee(amount, payment_method, currency)
+
+        total = amount + fee
+
+        return Response({
+            "success": True,
+            "estimation": {
+                "amount": CurrencyUtils.format_amount(amount),
+                "fee": CurrencyUtils.format_amount(fee),
+                "total": CurrencyUtils.format_amount(total),
+                "currency": currency,
+                "currency_info": CurrencyUtils.get_info(currency),
+                "transaction_type": transaction_type,
+                "payment_method": payment_method
+            }
+        }, status=status.HTTP_200_OK)
\ No newline at end of file
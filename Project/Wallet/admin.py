@@ -1,62 +1,129 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import cache
+from django.http import HttpResponse
 from .models import Wallet, Transaction
+from .utils.cache import CacheUtils
+from .utils.currency import CurrencyUtils
+
+# Durée de vie (secondes) du rendu HTML d'une changelist en cache
+ADMIN_CHANGELIST_CACHE_TIMEOUT = 30
+
+
+class OnlyChangeList(ChangeList):
+    """
+    ChangeList qui ne charge que les colonnes affichées
+
+    Les colonnes sont déclarées par l'admin dans `list_only_fields` ; les
+    vues de détail gardent le queryset complet de get_queryset.
+    """
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.only(*self.model_admin.list_only_fields)
+
+
+class CachedChangeListMixin:
+    """
+    Met en cache le rendu HTML de la changelist
+
+    Clé par session (jeton CSRF du formulaire d'actions) et URL complète
+    (filtres, recherche, tri, page). La version 'admin_changelist' du modèle
+    est changée à chaque écriture (signals.py) : une page n'est jamais servie
+    après une modification. Les pages portant des messages ne sont pas mises
+    en cache.
+    """
+
+    def changelist_view(self, request, extra_context=None):
+        session_key = request.session.session_key
+        if request.method != 'GET' or not session_key or len(messages.get_messages(request)):
+            return super().changelist_view(request, extra_context)
+
+        version = CacheUtils.get_version('admin_changelist', self.model._meta.model_name)
+        cache_key = (
+            f"admin_changelist:{self.model._meta.model_name}:{version}:"
+            f"{CacheUtils.make_etag(session_key, request.get_full_path())}"
+        )
+        content = cache.get(cache_key)
+        if content is not None:
+            return HttpResponse(content)
+
+        response = super().changelist_view(request, extra_context)
+        if response.status_code == 200 and hasattr(response, 'render'):
+            response.render()
+            cache.set(cache_key, response.content, ADMIN_CHANGELIST_CACHE_TIMEOUT)
+        return response
 
 
 @admin.register(Wallet)
-class WalletAdmin(admin.ModelAdmin):
+class WalletAdmin(CachedChangeListMixin, admin.ModelAdmin):
     list_display = ['id', 'user', 'balance', 'currency', 'is_active', 'created_at']
+    list_select_related = ['user']
+    list_only_fields = [
+        'id', 'user', 'user__full_phone_number', 'balance_cents', 'currency', 'is_active', 'created_at'
+    ]
     list_filter = ['is_active', 'currency', 'created_at']
     search_fields = ['user__full_phone_number', 'user__email']
     readonly_fields = ['id', 'balance_cents', 'created_at', 'updated_at']
 
+    def get_queryset(self, request):
+        # __str__ affiche le téléphone de l'utilisateur
+        return super().get_queryset(request).select_related('user')
+
+    def get_changelist(self, request, **kwargs):
+        return OnlyChangeList
+
     def balance(self, obj):
-        symbol = self._get_currency_symbol(obj.currency)
-        return f"{obj.balance} {symbol}"
+        return f"{obj.balance} {CurrencyUtils.get_symbol(obj.currency)}"
     balance.short_description = "Solde"
 
-    def _get_currency_symbol(self, currency):
-        symbols = {
-            'EUR': '€', 'XAF': 'FCFA', 'XOF': 'FCFA', 'NGN': '₦',
-            'GHS': '₵', 'KES': 'KSh', 'ZAR': 'R'
-        }
-        return symbols.get(currency, currency)
-
 
 @admin.register(Transaction)
-class TransactionAdmin(admin.ModelAdmin):
+class TransactionAdmin(CachedChangeListMixin, admin.ModelAdmin):
     list_display = [
         'id', 'wallet', 'transaction_type', 'payment_method',
         'amount_euros', 'currency', 'fee_euros', 'status', 'created_at'
     ]
+    list_select_related = ['wallet__user']
+    list_only_fields = [
+        'id', 'wallet', 'wallet__currency', 'wallet__user', 'wallet__user__full_phone_number',
+        'transaction_type', 'payment_method', 'amount_cents', 'currency', 'fee_cents',
+        'status', 'created_at'
+    ]
+    # Table volumineuse : pas de COUNT(*) global en plus du compte filtré
+    show_full_result_count = False
+    list_per_page = 50
+    list_max_show_all = 200
     list_filter = [
         'transaction_type', 'payment_method', 'status', 'currency', 'created_at'
     ]
+    # Recherches indexables : préfixe du téléphone, références Flutterwave exactes
     search_fields = [
-        'wallet__user__full_phone_number',
-        'flutterwave_reference',
-        'flutterwave_transaction_id'
+        'wallet__user__full_phone_number__startswith',
+        'flutterwave_reference__exact',
+        'flutterwave_transaction_id__exact'
     ]
     readonly_fields = [
         'id', 'amount_cents', 'fee_cents', 'created_at', 'updated_at', 'completed_at'
     ]
+    # Saisie par identifiant : évite de lister tous les wallets / méthodes dans le formulaire
+    raw_id_fields = ['wallet', 'payment_method_saved']
+
+    def get_queryset(self, request):
+        # La colonne wallet et wallet_user lisent wallet.user
+        return super().get_queryset(request).select_related('wallet__user')
+
+    def get_changelist(self, request, **kwargs):
+        return OnlyChangeList
 
     def amount_euros(self, obj):
-        symbol = self._get_currency_symbol(obj.currency)
-        return f"{obj.amount_euros} {symbol}"
+        return f"{obj.amount_euros} {CurrencyUtils.get_symbol(obj.currency)}"
     amount_euros.short_description = "Montant"
 
     def fee_euros(self, obj):
-        symbol = self._get_currency_symbol(obj.currency)
-        return f"{obj.fee_euros} {symbol}"
+        return f"{obj.fee_euros} {CurrencyUtils.get_symbol(obj.currency)}"
     fee_euros.short_description = "Frais"
 
     def wallet_user(self, obj):
         return obj.wallet.user.full_phone_number
     wallet_user.short_description = "Utilisateur"
-
-    def _get_currency_symbol(self, currency):
-        symbols = {
-            'EUR': '€', 'XAF': 'FCFA', 'XOF': 'FCFA', 'NGN': '₦',
-            'GHS': '₵', 'KES': 'KSh', 'ZAR': 'R'
-        }
-        return symbols.get(currency, currency)
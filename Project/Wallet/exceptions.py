@@ -0,0 +1,38 @@
+"""
+Gestionnaire d'exceptions DRF de l'API
+"""
+import structlog
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import exception_handler
+
+logger = structlog.get_logger(__name__)
+
+
+def api_exception_handler(exc, context):
+    """
+    Renvoie les erreurs de validation au format standard de l'API
+
+    Les vues valident avec `serializer.is_valid(raise_exception=True)` ; la
+    ValidationError levée est convertie ici en
+    {"success": False, "error": "Données invalides", "details": ...}.
+    Les autres exceptions gardent le traitement par défaut de DRF.
+    """
+    if not isinstance(exc, ValidationError):
+        return exception_handler(exc, context)
+
+    request = context.get('request')
+    user = getattr(request, 'user', None)
+    logger.warning(
+        "request_validation_failed",
+        view=context['view'].__class__.__name__,
+        user_id=str(user.id) if user is not None and user.is_authenticated else None,
+        errors=exc.detail
+    )
+
+    return Response({
+        "success": False,
+        "error": "Données invalides",
+        "details": exc.detail
+    }, status=status.HTTP_400_BAD_REQUEST)
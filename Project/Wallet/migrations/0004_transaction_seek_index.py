@@ -0,0 +1,22 @@
+# Generated by Django 5.1.5 on 2026-10-17 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Wallet', '0003_transaction_extra_data_transaction_transfer_proof'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='version',
+            field=models.IntegerField(default=0, help_text='Version pour le verrouillage optimiste'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['wallet', '-created_at', '-id'], name='tx_wallet_seek_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-17 13:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Wallet', '0004_transaction_seek_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_wallet__127b5c_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['wallet', 'status', '-created_at'], name='tx_wallet_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['wallet', 'transaction_type', '-created_at'], name='tx_wallet_type_date_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.5 on 2026-10-17 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Wallet', '0005_transaction_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['flutterwave_transaction_id'], name='transaction_flutter_b6f523_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', '-created_at'], name='tx_status_date_idx'),
+        ),
+    ]
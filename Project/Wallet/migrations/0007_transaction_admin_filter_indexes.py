@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-17 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Wallet', '0006_transaction_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['transaction_type', '-created_at'], name='tx_type_date_idx'),
+        ),
+    ]
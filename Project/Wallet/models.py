@@ -1,8 +1,10 @@
 from django.db import models
+from django.db.models import F
 from django.conf import settings
 from django.utils import timezone
 import uuid
 import structlog
+from types import MappingProxyType
 import pycountry
 import phonenumbers
 from decimal import Decimal
@@ -10,6 +12,52 @@ from phonenumbers import PhoneNumberFormat
 
 logger = structlog.get_logger(__name__)
 
+# Mapping pays -> devise (COMPLET pour Afrique/Europe), en lecture seule
+REGION_TO_CURRENCY = MappingProxyType({
+    # Afrique du Nord
+    'MA': 'MAD',  # Maroc
+    'DZ': 'DZD',  # Algérie
+    'TN': 'TND',  # Tunisie
+    'EG': 'EGP',  # Égypte
+
+    # Zone Euro
+    'FR': 'EUR', 'DE': 'EUR', 'IT': 'EUR', 'ES': 'EUR',
+    'BE': 'EUR', 'NL': 'EUR', 'PT': 'EUR', 'IE': 'EUR',
+
+    # Afrique Francophone (XAF)
+    'CM': 'XAF', 'GA': 'XAF', 'CF': 'XAF', 'TD': 'XAF', 'CG': 'XAF',
+
+    # Afrique Francophone (XOF)
+    'CI': 'XOF', 'SN': 'XOF', 'ML': 'XOF', 'BJ': 'XOF', 'BF': 'XOF',
+
+    # Afrique Anglophone / Autres
+    'NG': 'NGN', 'GH': 'GHS', 'KE': 'KES', 'ZA': 'ZAR',
+    'US': 'USD', 'GB': 'GBP'
+})
+
+# Devises généralement supportées en sandbox sans restriction
+SANDBOX_SAFE_CURRENCIES = frozenset({'NGN', 'USD', 'KES', 'GHS', 'ZAR', 'TZS', 'UGX'})
+
+
+def _build_country_code_currencies():
+    """
+    Indicatif pays (sans '+') -> devise, construit une seule fois à l'import
+
+    Un indicatif n'est retenu que si la devise ne dépend pas du numéro :
+    indicatif d'un seul pays, ou partagé uniquement par des pays en EUR
+    (devise par défaut, y compris pour un numéro non attribuable). Les
+    autres (+1, +44, +7...) passent par phonenumbers.
+    """
+    table = {}
+    for country_code, regions in phonenumbers.COUNTRY_CODE_TO_REGION_CODE.items():
+        currencies = {REGION_TO_CURRENCY.get(region, 'EUR') for region in regions}
+        if len(regions) == 1 or currencies == {'EUR'}:
+            table[str(country_code)] = currencies.pop()
+    return MappingProxyType(table)
+
+
+COUNTRY_CODE_TO_CURRENCY = _build_country_code_currencies()
+
 
 class Wallet(models.Model):
     """
@@ -64,24 +112,22 @@ class Wallet(models.Model):
 
     def add_balance(self, amount):
         """Ajoute un montant au solde de manière atomique"""
-        from django.db.models import F
         amount_cents = int(Decimal(str(amount)) * 100)
         self.balance_cents = F('balance_cents') + amount_cents
-        self.save(update_fields=['balance_cents'])
-        self.refresh_from_db()
-        logger.info("wallet_balance_added_atomic", user_id=str(self.user.id), amount=amount, new_balance=self.balance, currency=self.currency)
+        self.save(update_fields=['balance_cents', 'updated_at'])
+        self.refresh_from_db(fields=['balance_cents'])
+        logger.info("wallet_balance_added_atomic", user_id=str(self.user_id), amount=amount, new_balance=self.balance, currency=self.currency)
 
     def subtract_balance(self, amount):
         """Soustrait un montant du solde de manière atomique"""
-        from django.db.models import F
         amount_cents = int(Decimal(str(amount)) * 100)
         
         # Note: La vérification du solde ici est indicative car F() n'est évalué qu'en DB.
         # En production, on utilise select_for_update() dans le service pour une vérification rigoureuse.
         self.balance_cents = F('balance_cents') - amount_cents
-        self.save(update_fields=['balance_cents'])
-        self.refresh_from_db()
-        logger.info("wallet_balance_subtracted_atomic", user_id=str(self.user.id), amount=amount, new_balance=self.balance, currency=self.currency)
+        self.save(update_fields=['balance_cents', 'updated_at'])
+        self.refresh_from_db(fields=['balance_cents'])
+        logger.info("wallet_balance_subtracted_atomic", user_id=str(self.user_id), amount=amount, new_balance=self.balance, currency=self.currency)
 
     @staticmethod
     def get_currency_from_phone_number(phone_number):
@@ -94,49 +140,29 @@ class Wallet(models.Model):
         Returns:
             str: Code devise (EUR, XAF, USD, etc.)
         """
-        from django.conf import settings
-        
         try:
-            # Parse le numéro pour obtenir le code pays
-            parsed = phonenumbers.parse(phone_number, None)
-            
-            # Utiliser le code de région (ex: 'FR', 'CM', 'MA') directement
-            region_code = phonenumbers.region_code_for_number(parsed)
-            
-            # Mapping pays -> devise (COMPLET pour Afrique/Europe)
-            currency_map = {
-                # Afrique du Nord
-                'MA': 'MAD',  # Maroc
-                'DZ': 'DZD',  # Algérie
-                'TN': 'TND',  # Tunisie
-                'EG': 'EGP',  # Égypte
-                
-                # Zone Euro
-                'FR': 'EUR', 'DE': 'EUR', 'IT': 'EUR', 'ES': 'EUR', 
-                'BE': 'EUR', 'NL': 'EUR', 'PT': 'EUR', 'IE': 'EUR',
-                
-                # Afrique Francophone (XAF)
-                'CM': 'XAF', 'GA': 'XAF', 'CF': 'XAF', 'TD': 'XAF', 'CG': 'XAF',
-                
-                # Afrique Francophone (XOF)
-                'CI': 'XOF', 'SN': 'XOF', 'ML': 'XOF', 'BJ': 'XOF', 'BF': 'XOF',
-                
-                # Afrique Anglophone / Autres
-                'NG': 'NGN', 'GH': 'GHS', 'KE': 'KES', 'ZA': 'ZAR',
-                'US': 'USD', 'GB': 'GBP'
-            }
-            
-            detected_currency = currency_map.get(region_code, 'EUR')
+            # Indicatif pays lu directement (les indicatifs n'ont pas de préfixe commun)
+            detected_currency = None
+            if phone_number.startswith('+'):
+                for length in (3, 2, 1):
+                    detected_currency = COUNTRY_CODE_TO_CURRENCY.get(phone_number[1:1 + length])
+                    if detected_currency is not None:
+                        break
+
+            if detected_currency is None:
+                # Parse le numéro pour obtenir le code pays
+                parsed = phonenumbers.parse(phone_number, None)
+
+                # Utiliser le code de région (ex: 'FR', 'CM', 'MA') directement
+                region_code = phonenumbers.region_code_for_number(parsed)
+                detected_currency = REGION_TO_CURRENCY.get(region_code, 'EUR')
             
             # Gestion SANDBOX
             is_sandbox = getattr(settings, 'FLUTTERWAVE_ENVIRONMENT', 'sandbox') == 'sandbox'
             
             if is_sandbox:
-                # Liste des devises généralement supportées en sandbox sans restriction
-                sandbox_safe_currencies = ['NGN', 'USD', 'KES', 'GHS', 'ZAR', 'TZS', 'UGX']
-                
                 # Si la devise détectée n'est pas "safe" en sandbox (ex: MAD, EUR, XAF), on force USD
-                if detected_currency not in sandbox_safe_currencies:
+                if detected_currency not in SANDBOX_SAFE_CURRENCIES:
                     logger.info("sandbox_currency_fallback", 
                                 original=detected_currency, 
                                 fallback='USD', 
@@ -257,7 +283,8 @@ class Transaction(models.Model):
     )
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='transactions')
+    # Pas d'index simple : les index composites commençant par wallet le couvrent
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='transactions', db_index=False)
     
     # Lien vers la méthode de paiement sauvegardée (optionnel)
     payment_method_saved = models.ForeignKey(
@@ -324,11 +351,20 @@ class Transaction(models.Model):
         verbose_name_plural = "Transactions"
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['wallet', 'status']),
+            # Historique d'un wallet filtré par statut ou par type, trié par date
+            models.Index(fields=['wallet', 'status', '-created_at'], name='tx_wallet_status_date_idx'),
+            models.Index(fields=['wallet', 'transaction_type', '-created_at'], name='tx_wallet_type_date_idx'),
             models.Index(fields=['transaction_type', 'status']),
             models.Index(fields=['currency']),
             models.Index(fields=['flutterwave_reference']),
+            models.Index(fields=['flutterwave_transaction_id']),
+            # Tri et filtre par date seuls (liste admin par défaut, filtre created_at)
             models.Index(fields=['created_at']),
+            # Liste admin filtrée par statut ou par type, triée par date
+            models.Index(fields=['status', '-created_at'], name='tx_status_date_idx'),
+            models.Index(fields=['transaction_type', '-created_at'], name='tx_type_date_idx'),
+            # Pagination par curseur (keyset) de l'historique d'un wallet
+            models.Index(fields=['wallet', '-created_at', '-id'], name='tx_wallet_seek_idx'),
         ]
 
     def __str__(self):
@@ -373,7 +409,6 @@ class Transaction(models.Model):
         
         # Met à jour le solde du wallet seulement s'il ne l'a pas déjà été
         if not self.balance_adjusted:
-            from decimal import Decimal
             if self.transaction_type == 'deposit':
                 self.wallet.add_balance(self.amount_euros)
                 self.balance_adjusted = True
@@ -395,7 +430,7 @@ class Transaction(models.Model):
         logger.warning(
             "transaction_failed",
             transaction_id=str(self.id),
-            user_id=str(self.wallet.user.id),
+            user_id=str(self.wallet.user_id),
             currency=self.currency,
             error_code=error_code,
             error_message=error_message
@@ -415,7 +450,7 @@ class Transaction(models.Model):
         logger.info(
             "transaction_cancelled",
             transaction_id=str(self.id),
-            user_id=str(self.wallet.user.id),
+            user_id=str(self.wallet.user_id),
             currency=self.currency,
             reason=reason
         )
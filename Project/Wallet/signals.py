@@ -1,9 +1,11 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.conf import settings
 import structlog
 
+from .models import PaymentMethod, Transaction, Wallet
 from .Services.wallet_service import wallet_service
+from .utils.cache import CacheUtils
 
 logger = structlog.get_logger(__name__)
 
@@ -26,4 +28,39 @@ def create_wallet_for_new_user(sender, instance, created, **kwargs):
                 "auto_wallet_creation_failed",
                 user_id=str(instance.id),
                 error=str(e)
-            )
\ No newline at end of file
+            )
+
+@receiver(post_save, sender=PaymentMethod)
+def invalidate_payment_methods_cache(sender, instance, **kwargs):
+    """
+    Invalide l'ETag de la liste des méthodes de paiement de l'utilisateur
+    (au commit : voir CacheUtils.bump_version)
+    """
+    CacheUtils.bump_version('payment_methods', instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Transaction)
+def invalidate_transactions_cache(sender, instance, **kwargs):
+    """
+    Invalide l'historique en cache du wallet concerné et les statistiques globales
+    (au commit : voir CacheUtils.bump_version)
+    """
+    CacheUtils.bump_version('transactions', instance.wallet_id)
+    wallet_service.invalidate_wallet_statistics()
+
+
+@receiver(post_save, sender=Wallet)
+def invalidate_wallet_statistics_cache(sender, instance, **kwargs):
+    """
+    Invalide les statistiques globales (nombre de wallets, solde total)
+    """
+    wallet_service.invalidate_wallet_statistics()
+
+
+@receiver([post_save, post_delete], sender=Transaction)
+@receiver([post_save, post_delete], sender=Wallet)
+def invalidate_admin_changelist_cache(sender, **kwargs):
+    """
+    Invalide les changelists admin en cache du modèle modifié
+    """
+    CacheUtils.bump_version('admin_changelist', sender._meta.model_name)
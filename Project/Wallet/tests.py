@@ -1,3 +1,440 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from Accounts.authentication import WalletJWTAuthentication
+from Accounts.models import User
+from .models import Transaction
+from .Services.flutterwave_service import flutterwave_service
+from .Services.payment_method_service import payment_method_service
+from .Services.wallet_service import wallet_service
+from .Views.wallet_views import WITHDRAWAL_INFLIGHT_TIMEOUT
+from .utils.cache import CacheUtils
+
+
+class WalletAPITestCase(TestCase):
+    """
+    Base des tests de l'API wallet : utilisateur authentifié par JWT
+    (WalletJWTAuthentication, comme en production) et cache vidé
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(phone_number="612345678", country_code="+33")
+        self.wallet = self.user.wallet
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def create_payment_method(self, label="Mon Orange Money", is_default=False):
+        return payment_method_service.create_orange_money_payment_method(
+            user=self.user,
+            label=label,
+            orange_money_number="+221771234567",
+            is_default=is_default
+        )
+
+    def create_transaction(self, payment_method=None, **fields):
+        values = {
+            'wallet': self.wallet,
+            'transaction_type': 'deposit',
+            'payment_method': 'orange_money',
+            'amount_cents': 1000,
+            'currency': self.wallet.currency,
+            'payment_method_saved': payment_method,
+        }
+        values.update(fields)
+        return Transaction.objects.create(**values)
+
+    def assert_refreshed_after(self, url, mutate):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Les invalidations sont exécutées au commit
+        with self.captureOnCommitCallbacks(execute=True):
+            mutate()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        return response
+
+
+class PaymentMethodETagTests(WalletAPITestCase):
+    """
+    Les réponses qui imbriquent payment_method_saved_info doivent changer
+    d'ETag quand une méthode de paiement de l'utilisateur est modifiée
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.payment_method = self.create_payment_method(label="old")
+        self.create_transaction(payment_method=self.payment_method)
+
+    def rename_payment_method(self):
+        self.payment_method.label = "new"
+        self.payment_method.save()
+
+    def test_wallet_view_etag_tracks_payment_method_rename(self):
+        response = self.assert_refreshed_after(reverse('Wallet:wallet'), self.rename_payment_method)
+        recent = response.json()["wallet"]["recent_transactions"]
+        self.assertEqual(recent[0]["payment_method_saved_info"]["label"], "new")
+
+    def test_transaction_list_etag_tracks_payment_method_rename(self):
+        response = self.assert_refreshed_after(reverse('Wallet:transaction_list'), self.rename_payment_method)
+        transactions = response.json()["transactions"]
+        self.assertEqual(transactions[0]["payment_method_saved_info"]["label"], "new")
+
+    def test_etags_track_default_payment_method_switch(self):
+        def set_default():
+            payment_method_service.set_default_payment_method(self.user, self.payment_method)
+
+        self.assert_refreshed_after(reverse('Wallet:wallet'), set_default)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.payment_method.is_default = False
+            self.payment_method.save()
+        self.assert_refreshed_after(reverse('Wallet:transaction_list'), set_default)
+
+    def test_cached_wallet_payload_tracks_payment_method_rename(self):
+        url = reverse('Wallet:wallet')
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rename_payment_method()
+
+        # Requête non conditionnelle : la représentation en cache ne doit pas être resservie
+        recent = self.client.get(url).json()["wallet"]["recent_transactions"]
+        self.assertEqual(recent[0]["payment_method_saved_info"]["label"], "new")
+
+    def test_etags_change_only_once_atomic_write_commits(self):
+        url = reverse('Wallet:wallet')
+        etag = self.client.get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with db_transaction.atomic():
+                self.rename_payment_method()
+                self.create_transaction()
+                # Avant commit : une lecture concurrente verrait encore les anciennes
+                # lignes, elle doit donc rester sous l'ancienne version
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["wallet"]["transactions_count"], 2)
+
+    def test_set_default_bumps_version_at_commit(self):
+        version = CacheUtils.get_version('payment_methods', self.user.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with db_transaction.atomic():
+                payment_method_service.set_default_payment_method(self.user, self.payment_method)
+                self.assertEqual(CacheUtils.get_version('payment_methods', self.user.id), version)
+
+        self.assertNotEqual(CacheUtils.get_version('payment_methods', self.user.id), version)
+
+
+class TransactionETagTests(WalletAPITestCase):
+    """
+    Toute écriture sur les transactions d'un wallet change l'ETag de son historique
+    """
+
+    def test_transaction_list_etag_tracks_creation(self):
+        self.create_transaction()
+        response = self.assert_refreshed_after(reverse('Wallet:transaction_list'), self.create_transaction)
+        self.assertEqual(len(response.json()["transactions"]), 2)
+
+    def test_transaction_list_etag_tracks_deletion(self):
+        self.create_transaction()
+        transaction = self.create_transaction()
+        response = self.assert_refreshed_after(reverse('Wallet:transaction_list'), transaction.delete)
+        self.assertEqual(len(response.json()["transactions"]), 1)
+
+
+class WebhookReplayTests(WalletAPITestCase):
+    """
+    Un webhook rejoué ou contradictoire ne doit jamais créditer ni
+    rembourser deux fois : le statut est revérifié sous verrou
+    """
+
+    def test_replayed_deposit_webhook_credits_once(self):
+        self.create_transaction(flutterwave_reference="dep-1")
+        payload = {"event": "charge.completed", "data": {"tx_ref": "dep-1", "status": "successful", "id": 1}}
+
+        wallet_service.process_webhook(payload)
+        wallet_service.process_webhook(payload)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance_cents, 1000)
+
+    def test_failed_webhook_after_completion_keeps_deposit_completed(self):
+        transaction = self.create_transaction(flutterwave_reference="dep-2")
+        wallet_service.process_webhook(
+            {"event": "charge.completed", "data": {"tx_ref": "dep-2", "status": "successful", "id": 2}}
+        )
+        wallet_service.process_webhook(
+            {"event": "charge.completed", "data": {"tx_ref": "dep-2", "status": "failed", "id": 2}}
+        )
+
+        transaction.refresh_from_db()
+        self.assertEqual(transaction.status, 'completed')
+
+    def test_replayed_failed_transfer_webhook_refunds_once(self):
+        self.wallet.add_balance(Decimal('10.00'))
+        transaction = self.create_transaction(
+            transaction_type='withdrawal', flutterwave_reference="wd-1", status='processing'
+        )
+        self.wallet.subtract_balance(Decimal('10.00'))
+        transaction.balance_adjusted = True
+        transaction.save()
+        payload = {"event": "transfer.completed", "data": {"reference": "wd-1", "status": "FAILED"}}
+
+        wallet_service.process_webhook(payload)
+        wallet_service.process_webhook(payload)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance_cents, 1000)
+
+    def test_admin_update_rechecks_status(self):
+        transaction = self.create_transaction(flutterwave_reference="dep-3")
+        wallet_service.process_webhook(
+            {"event": "charge.completed", "data": {"tx_ref": "dep-3", "status": "successful", "id": 3}}
+        )
+
+        result = wallet_service.update_transaction_status(transaction.id, 'completed')
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["code"], "invalid_status_transition")
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance_cents, 1000)
+
+
+    @mock.patch.object(flutterwave_service, 'verify_transaction')
+    def test_status_check_does_not_fail_a_completed_transaction(self, verify_transaction):
+        verify_transaction.return_value = {"success": True, "status": "failed", "flutterwave_status": "failed"}
+        stale = self.create_transaction(
+            flutterwave_reference="dep-4", flutterwave_transaction_id="4", status='processing'
+        )
+        wallet_service.process_webhook(
+            {"event": "charge.completed", "data": {"tx_ref": "dep-4", "status": "successful", "id": 4}}
+        )
+
+        wallet_service.check_transaction_status(stale)
+
+        self.assertEqual(stale.status, 'completed')
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance_cents, 1000)
+
+    @mock.patch.object(flutterwave_service, 'verify_transaction')
+    def test_status_check_fails_a_pending_transaction(self, verify_transaction):
+        verify_transaction.return_value = {"success": True, "status": "failed", "flutterwave_status": "failed"}
+        transaction = self.create_transaction(flutterwave_transaction_id="5", status='processing')
+
+        wallet_service.check_transaction_status(transaction)
+
+        self.assertEqual(transaction.status, 'failed')
+
+class AmountRenderingTests(WalletAPITestCase):
+    """
+    Les montants sortent de l'API en chaînes exactes à deux décimales,
+    jamais en float
+    """
+
+    def verify_kyc(self):
+        self.user.kyc_status = 'verified'
+        self.user.save(update_fields=['kyc_status'])
+
+    def test_fee_estimate_amounts_are_exact_strings(self):
+        response = self.client.post(
+            reverse('Wallet:estimate_fees'),
+            {"transaction_type": "deposit", "amount": "100.10", "payment_method": "card"},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        estimation = response.json()["estimation"]
+        self.assertEqual(estimation["amount"], "100.10")
+        self.assertIsInstance(estimation["fee"], str)
+        self.assertEqual(Decimal(estimation["total"]), Decimal(estimation["amount"]) + Decimal(estimation["fee"]))
+
+    def test_wallet_and_transaction_amounts_are_exact_strings(self):
+        self.wallet.add_balance(Decimal('0.30'))
+        self.create_transaction(amount_cents=1005, fee_cents=7)
+
+        wallet = self.client.get(reverse('Wallet:wallet')).json()["wallet"]
+        self.assertEqual(wallet["balance"], "0.30")
+        transaction = wallet["recent_transactions"][0]
+        self.assertEqual(transaction["amount"], "10.05")
+        self.assertEqual(transaction["fee"], "0.07")
+
+    @mock.patch.object(flutterwave_service, 'initiate_deposit')
+    def test_deposit_payload_amounts_are_exact_strings(self, initiate_deposit):
+        initiate_deposit.return_value = {"success": True, "reference": "dep-ref", "charge_id": "1"}
+        self.verify_kyc()
+        response = self.client.post(
+            reverse('Wallet:deposit'),
+            {"amount": "100.10", "payment_method": "orange_money"},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        payload = response.json()
+        self.assertEqual(payload["amount"], "100.10")
+        self.assertIsInstance(payload["fee"], str)
+        self.assertEqual(Decimal(payload["total"]), Decimal(payload["amount"]) + Decimal(payload["fee"]))
+
+    @mock.patch.object(flutterwave_service, 'initiate_withdrawal')
+    def test_withdrawal_payload_amounts_are_exact_strings(self, initiate_withdrawal):
+        initiate_withdrawal.return_value = {"success": True, "reference": "wd-ref"}
+        self.verify_kyc()
+        self.wallet.add_balance(Decimal('50.00'))
+        response = self.client.post(
+            reverse('Wallet:withdraw'),
+            {
+                "amount": "10.10",
+                "payment_method": "card",
+                "account_number": "0690000031",
+                "bank_code": "044",
+                "account_name": "Test User"
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        payload = response.json()
+        self.assertEqual(payload["amount"], "10.10")
+        self.assertIsInstance(payload["fee"], str)
+        self.assertEqual(
+            Decimal(payload["total_deducted"]), Decimal(payload["amount"]) + Decimal(payload["fee"])
+        )
+
+    def test_insufficient_balance_amounts_are_exact_strings(self):
+        self.verify_kyc()
+        self.wallet.add_balance(Decimal('1.10'))
+        response = self.client.post(
+            reverse('Wallet:withdraw'),
+            {"amount": "10.10", "payment_method": "orange_money", "orange_money_number": "+221771234567"},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400, response.content)
+        payload = response.json()
+        self.assertEqual(payload["available_balance"], "1.10")
+        self.assertIsInstance(payload["required_amount"], str)
+
+
+class WithdrawalLockTests(WalletAPITestCase):
+    """
+    Verrou de retrait en cours : libéré uniquement par son détenteur
+    """
+
+    def test_release_ignores_foreign_token(self):
+        token = CacheUtils.acquire_lock("lock:test", 60)
+        self.assertIsNotNone(token)
+        self.assertIsNone(CacheUtils.acquire_lock("lock:test", 60))
+
+        # Détenteur dont le verrou a expiré puis été repris
+        CacheUtils.release_lock("lock:test", "expired-token")
+        self.assertEqual(cache.get("lock:test"), token)
+
+        CacheUtils.release_lock("lock:test", token)
+        self.assertIsNone(cache.get("lock:test"))
+
+    def test_withdrawal_refused_while_lock_held(self):
+        CacheUtils.acquire_lock(f"withdrawal_inflight:{self.user.id}", 60)
+        response = self.client.post(
+            reverse('Wallet:withdraw'),
+            {"amount": "5.00", "payment_method": "orange_money", "orange_money_number": "+221771234567"},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()["code"], "withdrawal_in_progress")
+
+    def test_lock_outlives_worst_case_provider_call(self):
+        self.assertGreater(
+            WITHDRAWAL_INFLIGHT_TIMEOUT,
+            settings.FLUTTERWAVE_TIMEOUT * settings.FLUTTERWAVE_MAX_RETRIES
+        )
+
+
+class QueryCountTests(WalletAPITestCase):
+    """
+    Nombre de requêtes SQL par endpoint, indépendant du nombre de lignes
+    L'authentification JWT compte pour une requête (utilisateur + wallet)
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.payment_methods = [self.create_payment_method(label=f"Méthode {i}") for i in range(3)]
+
+    def test_payment_method_list_is_single_query(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('Wallet:payment_method_list'))
+        self.assertEqual(response.json()["count"], 3)
+
+    def test_set_default_serializes_without_extra_query(self):
+        payment_method = self.payment_methods[1]
+        # Auth, lecture, puis UPDATE groupé dans un atomic (SAVEPOINT / RELEASE)
+        with self.assertNumQueries(5):
+            response = self.client.post(
+                reverse('Wallet:payment_method_set_default', args=[payment_method.id])
+            )
+        self.assertTrue(response.json()["payment_method"]["is_default"])
+
+    def test_patch_serializes_without_extra_query(self):
+        payment_method = self.payment_methods[2]
+        # Auth, lecture, UPDATE
+        with self.assertNumQueries(3):
+            response = self.client.patch(
+                reverse('Wallet:payment_method_detail', args=[payment_method.id]),
+                {"label": "Renommée"},
+                format='json'
+            )
+        self.assertEqual(response.json()["payment_method"]["label"], "Renommée")
+
+    def test_jwt_authentication_loads_wallet_with_user(self):
+        authentication = WalletJWTAuthentication()
+        with self.assertNumQueries(1):
+            user = authentication.get_user(AccessToken.for_user(self.user))
+            wallet = wallet_service.get_or_create_wallet(user)
+        self.assertEqual(wallet.id, self.wallet.id)
+
+    def test_transaction_detail_is_single_query(self):
+        transaction = self.create_transaction(payment_method=self.payment_methods[0])
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('Wallet:transaction_detail', args=[transaction.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["transaction"]["payment_method_saved_info"]["label"], "Méthode 0"
+        )
+
+    def test_fee_estimate_reads_currency_from_authenticated_user(self):
+        # Devise du wallet chargé à l'authentification : aucune requête en plus
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                reverse('Wallet:estimate_fees'),
+                {"transaction_type": "deposit", "amount": "10.00", "payment_method": "card"},
+                format='json'
+            )
+        self.assertEqual(response.json()["estimation"]["currency"], self.wallet.currency)
+
+    def test_wallet_currency_without_loaded_wallet_reads_one_column(self):
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(wallet_service.get_wallet_currency(user), self.wallet.currency)
+
+    def test_cold_wallet_view_is_single_query(self):
+        for payment_method in self.payment_methods:
+            self.create_transaction(payment_method=payment_method)
+        self.create_transaction()
+        cache.clear()
 
-# Create your tests here.
+        # Auth + transactions récentes avec méthode jointe et total (COUNT(*) OVER ())
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('Wallet:wallet'))
+        wallet = response.json()["wallet"]
+        self.assertEqual(len(wallet["recent_transactions"]), 4)
+        self.assertEqual(wallet["transactions_count"], 4)
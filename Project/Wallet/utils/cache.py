@@ -0,0 +1,115 @@
+"""
+Utilitaires de cache pour les vues du portefeuille
+Versions par utilisateur (invalidation) et requêtes conditionnelles (ETag)
+"""
+import hashlib
+import uuid
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+# Durée de vie d'un numéro de version (régénéré à la première lecture s'il expire)
+VERSION_TIMEOUT = 60 * 60 * 24
+
+
+class CacheUtils:
+    """
+    Gestion des numéros de version en cache et des ETags
+
+    Une version est un jeton opaque par (namespace, clé). Toute mutation
+    l'invalide ; les clés de cache et ETags qui l'incluent deviennent
+    alors obsolètes sans avoir à les supprimer une par une.
+    """
+
+    @staticmethod
+    def _version_key(namespace, key):
+        return f"{namespace}:ver:{key}"
+
+    @staticmethod
+    def get_version(namespace, key):
+        """
+        Retourne la version courante, en la créant si elle n'existe pas
+
+        Args:
+            namespace: Famille de données (ex: 'payment_methods')
+            key: Identifiant du propriétaire (ex: user_id)
+
+        Returns:
+            str: Jeton de version
+        """
+        return cache.get_or_set(
+            CacheUtils._version_key(namespace, key),
+            lambda: uuid.uuid4().hex,
+            VERSION_TIMEOUT
+        )
+
+    @staticmethod
+    def bump_version(namespace, key):
+        """
+        Invalide la version courante (une nouvelle sera générée à la prochaine lecture)
+
+        L'invalidation est différée au commit de la transaction en cours
+        (immédiate hors transaction) : une lecture concurrente ne peut pas
+        mettre en cache les lignes d'avant commit sous la nouvelle version.
+        """
+        version_key = CacheUtils._version_key(namespace, key)
+        db_transaction.on_commit(lambda: cache.delete(version_key))
+
+    @staticmethod
+    def acquire_lock(key, timeout):
+        """
+        Pose un verrou applicatif en cache s'il est libre
+
+        Le verrou n'exclut que les processus qui partagent le même cache :
+        avec LocMemCache il est propre à chaque processus worker, un cache
+        partagé (Redis, Memcached) est requis pour l'exclusion entre workers.
+
+        Args:
+            key: Clé du verrou
+            timeout: Durée de vie (secondes), filet de sécurité si le
+                détenteur meurt sans le libérer
+
+        Returns:
+            str: Jeton du détenteur, ou None si le verrou est déjà pris
+        """
+        token = uuid.uuid4().hex
+        if cache.add(key, token, timeout=timeout):
+            return token
+        return None
+
+    @staticmethod
+    def release_lock(key, token):
+        """
+        Libère le verrou seulement s'il appartient encore au détenteur
+
+        Un verrou expiré puis repris par une autre requête n'est pas supprimé.
+        """
+        if cache.get(key) == token:
+            cache.delete(key)
+
+    @staticmethod
+    def make_etag(*parts):
+        """Construit un ETag stable à partir des éléments fournis"""
+        raw = ":".join(str(part) for part in parts)
+        return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def not_modified(request, etag):
+        """
+        Retourne une réponse 304 si le client possède déjà cette version
+
+        Args:
+            request: Requête courante
+            etag: ETag (non quoté) de la représentation courante
+
+        Returns:
+            HttpResponseNotModified ou None
+        """
+        return get_conditional_response(request, etag=quote_etag(etag))
+
+    @staticmethod
+    def set_etag(response, etag):
+        """Ajoute l'en-tête ETag à la réponse"""
+        response['ETag'] = quote_etag(etag)
+        return response
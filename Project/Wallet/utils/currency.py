@@ -0,0 +1,96 @@
+"""
+Référentiel des devises supportées (symboles et noms d'affichage)
+Tables construites une seule fois au chargement du module
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+CENT = Decimal('0.01')
+
+CURRENCY_SYMBOLS = {
+    'EUR': '€',
+    'XAF': 'FCFA',
+    'XOF': 'FCFA',
+    'NGN': '₦',
+    'GHS': '₵',
+    'KES': 'KSh',
+    'ZAR': 'R',
+    'TZS': 'TSh',
+    'UGX': 'USh',
+    'RWF': 'FRw',
+    'BIF': 'FBu',
+    'ZMW': 'ZK',
+    'ZWD': '$',
+}
+
+CURRENCY_NAMES = {
+    'EUR': 'Euro',
+    'XAF': 'Franc CFA (CEMAC)',
+    'XOF': 'Franc CFA (BCEAO)',
+    'NGN': 'Naira Nigérian',
+    'GHS': 'Cedi Ghanéen',
+    'KES': 'Shilling Kényan',
+    'ZAR': 'Rand Sud-Africain',
+    'TZS': 'Shilling Tanzanien',
+    'UGX': 'Shilling Ougandais',
+    'RWF': 'Franc Rwandais',
+    'BIF': 'Franc Burundais',
+    'ZMW': 'Kwacha Zambien',
+    'ZWD': 'Dollar Zimbabwéen',
+}
+
+# Bloc "currency_info" des réponses API, précalculé par devise
+CURRENCY_INFO = {
+    code: {'code': code, 'symbol': CURRENCY_SYMBOLS[code], 'name': CURRENCY_NAMES[code]}
+    for code in CURRENCY_SYMBOLS
+}
+
+
+class CurrencyUtils:
+    """
+    Accès aux informations d'affichage des devises
+    Les codes inconnus sont renvoyés tels quels
+    """
+
+    @staticmethod
+    def get_symbol(currency):
+        """Retourne le symbole de la devise"""
+        return CURRENCY_SYMBOLS.get(currency, currency)
+
+    @staticmethod
+    def get_name(currency):
+        """Retourne le nom complet de la devise"""
+        return CURRENCY_NAMES.get(currency, currency)
+
+    @staticmethod
+    def get_info(currency):
+        """
+        Retourne le bloc currency_info d'une devise
+
+        Args:
+            currency: Code ISO de la devise (ex: 'EUR')
+
+        Returns:
+            dict: {'code', 'symbol', 'name'} (copie, modifiable par l'appelant)
+        """
+        info = CURRENCY_INFO.get(currency)
+        if info is None:
+            return {'code': currency, 'symbol': currency, 'name': currency}
+        return dict(info)
+
+    @staticmethod
+    def format_amount(amount):
+        """
+        Rend un montant pour l'API sous forme de chaîne exacte à deux décimales
+
+        Args:
+            amount: Decimal ou entier (jamais un float, déjà inexact)
+
+        Returns:
+            str: Montant arrondi au centime (ex: '10.50')
+        """
+        return str(Decimal(amount).quantize(CENT, rounding=ROUND_HALF_UP))
+
+    @staticmethod
+    def format_cents(amount_cents):
+        """Rend un montant stocké en centimes (ex: 1050 -> '10.50')"""
+        return CurrencyUtils.format_amount(Decimal(amount_cents) / 100)